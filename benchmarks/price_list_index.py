@@ -0,0 +1,89 @@
+"""
+Compare looking up item prices by decoding the CSGOTrader price list for every item with
+looking them up in a price list index that is built once per run.
+
+Usage: python -m benchmarks.price_list_index
+"""
+
+import json
+import random
+import time
+from urllib.parse import quote
+
+from requests import Response
+
+from cs2tracker.config import STEAM_MARKET_LISTING_BASEURL_CS2
+from cs2tracker.scraper.parser import CSGOTraderParser, PriceSource
+
+PRICE_LIST_SIZE = 25000
+OWNED_ITEMS = 300
+
+
+def synthetic_price_list(size=PRICE_LIST_SIZE):
+    """Create a CSGOTrader steam price list with the given number of entries."""
+    return {
+        f"Synthetic Item {index} | Benchmark Edition": {
+            "last_24h": round(random.uniform(0.03, 1500), 2),
+            "last_7d": round(random.uniform(0.03, 1500), 2),
+            "last_30d": round(random.uniform(0.03, 1500), 2),
+            "last_90d": round(random.uniform(0.03, 1500), 2),
+        }
+        for index in range(size)
+    }
+
+
+def synthetic_response(price_list):
+    """Wrap a price list into a response object like the one returned by the
+    scraper.
+    """
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps(price_list).encode("utf-8")  # pylint: disable=protected-access
+    response.encoding = "utf-8"
+    return response
+
+
+def owned_item_hrefs(price_list, count=OWNED_ITEMS):
+    """Pick a random subset of the price list as the items owned by the user."""
+    names = random.sample(list(price_list), count)
+    return [STEAM_MARKET_LISTING_BASEURL_CS2 + quote(name) for name in names]
+
+
+def per_item_decode(item_page, item_hrefs):
+    """Look up every item by decoding the price list again for each item."""
+    for item_href in item_hrefs:
+        CSGOTraderParser.parse_item_price(item_page, item_href, PriceSource.STEAM)
+
+
+def indexed(item_page, item_hrefs):
+    """Look up every item in an index of the price list that is built only once."""
+    page_index = CSGOTraderParser.index_item_page(item_page, PriceSource.STEAM)
+    for item_href in item_hrefs:
+        CSGOTraderParser.lookup_item_price(page_index, item_href, PriceSource.STEAM)
+
+
+def timed(function, *args):
+    """Return the wall time in seconds that it takes to run the given function."""
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print the results."""
+    random.seed(0)
+    price_list = synthetic_price_list()
+    item_page = synthetic_response(price_list)
+    item_hrefs = owned_item_hrefs(price_list)
+
+    per_item_seconds = timed(per_item_decode, item_page, item_hrefs)
+    indexed_seconds = timed(indexed, item_page, item_hrefs)
+
+    print(f"Price list entries: {PRICE_LIST_SIZE}, owned items: {OWNED_ITEMS}")
+    print(f"Decode per item:    {per_item_seconds * 1000:10.1f} ms")
+    print(f"Indexed:            {indexed_seconds * 1000:10.1f} ms")
+    print(f"Speedup:            {per_item_seconds / indexed_seconds:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Measure the time it takes to extract the listings of a Steam market search page with
+BeautifulSoup and with lxml.
+
+Usage: python -m benchmarks.steam_page_parsing [saved_page.html ...]
+
+Without arguments, the benchmark runs on generated pages that follow the markup of
+the Steam market search page. Pass the paths of saved search pages to measure those
+instead.
+"""
+
+import random
+import sys
+import time
+from urllib.parse import quote
+
+from cs2tracker.config import STEAM_MARKET_LISTING_BASEURL_CS2
+from cs2tracker.scraper import parser
+from cs2tracker.scraper.parser import SteamParser
+
+LISTINGS_PER_PAGE = 10
+GENERATED_PAGES = 20
+REPETITIONS = 5
+
+
+def steam_search_page(names, seed=0):
+    """
+    Generate a Steam market search page that lists the given item names.
+
+    Besides the listings, the page contains the navigation, scripts and footer that make
+    up most of a real search page.
+
+    :param names: The market names of the items listed on the page.
+    :param seed: The seed for the generated prices and quantities.
+    :return: The HTML of the page.
+    """
+    rnd = random.Random(seed)
+    navigation = "\n".join(
+        f'<a class="menuitem" href="https://store.steampowered.com/menu/{index}">Menu {index}</a>'
+        for index in range(120)
+    )
+    scripts = "\n".join(
+        f"<script type=\"text/javascript\">var g_rgData{index} = {{'key': '{'x' * 400}'}};</script>"
+        for index in range(60)
+    )
+    listings = []
+    for index, name in enumerate(names):
+        price = rnd.uniform(0.03, 500)
+        quantity = rnd.randint(1, 99999)
+        listings.append(
+            f'<a class="market_listing_row_link" href="{STEAM_MARKET_LISTING_BASEURL_CS2 + quote(name)}" id="resultlink_{index}">'
+            f'<div class="market_listing_row market_recent_listing_row market_listing_searchresult" id="result_{index}" data-appid="730" data-hash-name="{name}">'
+            f'<img id="result_{index}_image" src="https://community.akamai.steamstatic.com/economy/image/{index}/62fx62f" alt="" class="market_listing_item_img">'
+            '<div class="market_listing_right_cell market_listing_their_price">'
+            '<span class="market_table_value normal_price">Starting at:<br/>\n'
+            f'<span class="normal_price" data-price="{int(price * 100)}" data-currency="1">${price:.2f} USD</span>\n'
+            f'<span class="sale_price">${price * 0.87:.2f} USD</span></span></div>'
+            '<div class="market_listing_right_cell market_listing_num_listings">'
+            f'<span class="market_table_value"><span class="market_listing_num_listings_qty" data-qty="{quantity}">{quantity:,}</span></span></div>'
+            f'<div class="market_listing_item_name_block"><span id="result_{index}_name" class="market_listing_item_name">{name}</span><br/>'
+            '<span class="market_listing_game_name">Counter-Strike 2</span></div></div></a>'
+        )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>Steam Community :: Market</title>'
+        f'{scripts}</head><body><div id="global_header">{navigation}</div>'
+        f"<div id=\"searchResultsRows\">{''.join(listings)}</div>"
+        f'<div id="footer">{navigation}</div></body></html>'
+    )
+
+
+def generated_pages():
+    """Generate search pages with the default number of listings of Steam."""
+    return [
+        steam_search_page(
+            [f"Sticker Capsule {page}-{index}" for index in range(LISTINGS_PER_PAGE)], seed=page
+        ).encode("utf-8")
+        for page in range(GENERATED_PAGES)
+    ]
+
+
+def saved_pages(paths):
+    """Read saved search pages from disk."""
+    pages = []
+    for path in paths:
+        with open(path, "rb") as page_file:
+            pages.append(page_file.read())
+    return pages
+
+
+def milliseconds_per_page(index_function, pages):
+    """Return the best average time in milliseconds that it takes to index a page."""
+    best = float("inf")
+    for _ in range(REPETITIONS):
+        start = time.perf_counter()
+        for page_content in pages:
+            index_function(page_content)
+        best = min(best, (time.perf_counter() - start) / len(pages))
+    return best * 1000
+
+
+def backends():
+    """Return the extraction backends that are available in this environment."""
+    available = {
+        "BeautifulSoup": SteamParser._index_listings_soup,  # pylint: disable=protected-access
+    }
+    if parser.lxml_html is not None:
+        available["lxml"] = SteamParser._index_listings_lxml  # pylint: disable=protected-access
+    return available
+
+
+def main():
+    """Run the benchmark and print the results."""
+    pages = saved_pages(sys.argv[1:]) if len(sys.argv) > 1 else generated_pages()
+    average_size = sum(len(page_content) for page_content in pages) / len(pages)
+    print(f"Pages: {len(pages)}, average size: {average_size / 1024:.0f} KiB")
+
+    baseline = None
+    for name, index_function in backends().items():
+        page_milliseconds = milliseconds_per_page(index_function, pages)
+        baseline = baseline or page_milliseconds
+        print(f"{name:<14} {page_milliseconds:8.2f} ms/page  {baseline / page_milliseconds:6.1f}x")
+
+    if parser.lxml_html is None:
+        print("lxml is not installed, install it with: pip install cs2tracker[fast]")
+
+
+if __name__ == "__main__":
+    main()
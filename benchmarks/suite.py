@@ -0,0 +1,318 @@
+"""
+Run the offline benchmark suite of the parsers, the scraper, the price logs and the
+currency conversion, and report the results as JSON so that runs of different versions
+can be compared.
+
+Usage: python -m benchmarks.suite [--output results.json] [--fixtures run.zip]
+    [--steam-page saved_page.html ...]
+
+Nothing is sent over the network: price lists and Steam pages are generated, the
+scraper replays a fixture archive of generated price lists and the price logs are
+written to a temporary directory. Pass a fixture archive recorded with
+`cs2tracker --record-fixtures` to replay that instead, and the paths of saved Steam
+market search pages to parse those instead of generated ones.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import unquote
+
+from benchmarks.price_list_index import (
+    indexed,
+    owned_item_hrefs,
+    per_item_decode,
+    synthetic_price_list,
+    synthetic_response,
+)
+from benchmarks.steam_page_parsing import generated_pages, saved_pages
+from cs2tracker.config import ValidatedConfig, get_config
+from cs2tracker.constants import VERSION
+from cs2tracker.logs import PriceLogs
+from cs2tracker.scraper.fixtures import FixtureArchive, FixtureMode
+from cs2tracker.scraper.parser import CSGOTraderParser, PriceSource, SteamParser
+from cs2tracker.scraper.scraper import Scraper
+from cs2tracker.util.currency_conversion import convert
+from cs2tracker.util.padded_console import get_console
+
+REPETITIONS = 5
+PARSED_ITEMS = 20
+LOG_YEARS = 5
+CONVERSIONS = 100000
+CONVERSION_CURRENCIES = ["EUR", "GBP", "JPY", "CHF", "PLN"]
+BENCHMARK_DISABLED_APP_SETTINGS = [
+    "price_cache_ttl_minutes",
+    "price_list_store",
+    "parse_processes",
+    "fallback_parsers",
+    "steam_bulk_search",
+    "run_stats",
+    "run_stats_log",
+]
+
+config = get_config()
+
+
+def measure(name, function, operations=1, repetitions=REPETITIONS):
+    """
+    Run a function repeatedly and summarize its wall times.
+
+    :param name: The name of the benchmark.
+    :param function: The function to time. It is called without arguments.
+    :param operations: How many operations a single call of the function performs.
+    :param repetitions: How many times the function is called.
+    :return: A dictionary with the timings of the benchmark in seconds.
+    """
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        "name": name,
+        "operations": operations,
+        "repetitions": repetitions,
+        "best_seconds": best,
+        "median_seconds": statistics.median(timings),
+        "best_seconds_per_operation": best / operations,
+    }
+
+
+def csgotrader_benchmarks():
+    """Parse item prices from a synthetic CSGOTrader price list with 25k items."""
+    random.seed(0)
+    price_list = synthetic_price_list()
+    item_page = synthetic_response(price_list)
+    item_hrefs = owned_item_hrefs(price_list, PARSED_ITEMS)
+
+    return [
+        measure(
+            "csgotrader_parse_item_price",
+            lambda: per_item_decode(item_page, item_hrefs),
+            len(item_hrefs),
+        ),
+        measure(
+            "csgotrader_index_and_lookup",
+            lambda: indexed(item_page, item_hrefs),
+            len(item_hrefs),
+        ),
+    ]
+
+
+def steam_benchmarks(page_paths):
+    """Parse the prices of all listings of saved or generated Steam search pages."""
+    pages = []
+    for page_content in saved_pages(page_paths) if page_paths else generated_pages():
+        item_page = synthetic_response({})
+        item_page._content = page_content  # pylint: disable=protected-access
+        listings = SteamParser.index_item_page(item_page)
+        item_hrefs = [item_href for item_href, price in listings.items() if price is not None]
+        pages.append((item_page, item_hrefs))
+
+    def parse_item_prices():
+        for item_page, item_hrefs in pages:
+            for item_href in item_hrefs:
+                SteamParser.parse_item_price(item_page, item_href)
+
+    listings = sum(len(item_hrefs) for _, item_hrefs in pages)
+    return [measure("steam_parse_item_price", parse_item_prices, listings)]
+
+
+def record_price_lists(archive_path):
+    """Record the CSGOTrader price lists of all sources for the items in the config,
+    padded with synthetic items to the size of the real price lists, into a fixture
+    archive.
+    """
+    random.seed(0)
+    market_names = [unquote(item_href.split("/")[-1]) for item_href in config.item_hrefs()]
+    steam = synthetic_price_list()
+    buff163 = {}
+    csfloat = {}
+    for name in list(steam) + market_names:
+        price = round(random.uniform(0.03, 1500), 2)
+        steam[name] = {"last_24h": price, "last_7d": price, "last_30d": price}
+        buff163[name.replace("Holo-Foil", "Holo/Foil")] = {"starting_at": {"price": price}}
+        csfloat[name] = {"price": price}
+
+    fixtures = FixtureArchive(archive_path)
+    for source, price_list in (
+        (PriceSource.STEAM, steam),
+        (PriceSource.BUFF163, buff163),
+        (PriceSource.CSFLOAT, csfloat),
+    ):
+        page_url = CSGOTraderParser.CSGOTRADER_PRICE_LIST.format(source.value)
+        fixtures.record(page_url, synthetic_response(price_list))
+    fixtures.save()
+
+
+def write_benchmark_config(config_file_path, async_scraping):
+    """
+    Write a copy of the config of the user that scrapes every configured item from the
+    fixtures alone, without proxies, notifications, cached prices, parse workers or any
+    files written for the user.
+
+    :param config_file_path: The path to write the config file to.
+    :param async_scraping: Whether the scraper uses the async engine.
+    """
+    benchmark_config = ValidatedConfig(config.config_file)
+    for section in benchmark_config.sections():
+        if section not in ("App Settings", "User Settings"):
+            for item_href in benchmark_config.options(section):
+                benchmark_config.set(section, item_href, "1")
+    benchmark_config.set("App Settings", "use_proxy", "False")
+    benchmark_config.set("App Settings", "discord_notifications", "False")
+    benchmark_config.set("App Settings", "async_scraping", str(async_scraping))
+    for option in BENCHMARK_DISABLED_APP_SETTINGS:
+        benchmark_config.remove_option("App Settings", option)
+    benchmark_config.remove_option("User Settings", "metrics_file")
+
+    benchmark_config.config_file = config_file_path
+    benchmark_config.write_to_file()
+
+
+def scraper_benchmarks(data_dir, archive_path=None):
+    """
+    Run whole scrapes of the configured items against a fixture archive.
+
+    :param data_dir: The directory to write the config, the fixtures and all files of
+        the scraper to.
+    :param archive_path: The fixture archive to replay, or None to replay generated
+        price lists.
+    """
+    if archive_path is None:
+        archive_path = os.path.join(data_dir, "price_lists.zip")
+        record_price_lists(archive_path)
+
+    # The price logs and the HTTP cache of the user must not be touched by the scraper
+    log_file = os.path.join(data_dir, "output.csv")
+    Path(log_file).touch()
+    scraper = Scraper(
+        log_file=log_file,
+        item_price_log_file=os.path.join(data_dir, "item_prices.sqlite"),
+        http_cache_dir=os.path.join(data_dir, "http_cache"),
+    )
+    scraper.use_fixtures(archive_path, FixtureMode.REPLAY)
+
+    # All scraper modules share the config, so the benchmark config is loaded into it
+    # for the duration of the benchmarks and the config of the user is loaded back after
+    user_config_file = config.config_file
+    items = len(config.item_hrefs())
+    results = []
+    get_console().console.quiet = True
+    try:
+        for engine, async_scraping in (("sync", False), ("async", True)):
+            benchmark_config_file = os.path.join(data_dir, f"config_{engine}.ini")
+            write_benchmark_config(benchmark_config_file, async_scraping)
+            config.config_file = benchmark_config_file
+            config.load_from_file()
+            results.append(measure(f"scrape_prices_{engine}", scraper.scrape_prices, items))
+    finally:
+        get_console().console.quiet = False
+        config.config_file = user_config_file
+        config.load_from_file()
+
+    return results
+
+
+def write_price_logs(log_file_path, years=LOG_YEARS):
+    """Write price logs with one entry for every day of the given number of years."""
+    random.seed(0)
+    first_date = datetime.now() - timedelta(days=365 * years)
+    with open(log_file_path, "w", encoding="utf-8") as price_logs:
+        for day in range(365 * years):
+            date = (first_date + timedelta(days=day)).strftime("%Y-%m-%d")
+            usd_totals = [f"{random.uniform(100, 5000):.2f}$" for _ in range(3)]
+            price_logs.write(",".join([date] + usd_totals) + "\n")
+
+
+def price_log_benchmarks(data_dir):
+    """Read and save price logs that span multiple years."""
+    log_file = os.path.join(data_dir, "price_logs.csv")
+    write_price_logs(log_file)
+    days = 365 * LOG_YEARS
+
+    return [
+        measure("price_logs_read", lambda: PriceLogs.read(log_file=log_file), days),
+        measure(
+            "price_logs_read_with_symbols",
+            lambda: PriceLogs.read(newest_first=True, with_symbols=True, log_file=log_file),
+            days,
+        ),
+        measure("price_logs_tail", lambda: PriceLogs.tail(5, log_file), 5),
+        # The first save appends today's entry and all further saves replace it
+        measure("price_logs_save", lambda: PriceLogs.save([1234.56, 2345.67, 3456.78], log_file)),
+    ]
+
+
+def currency_conversion_benchmarks():
+    """Convert many amounts from USD to a few currencies."""
+    random.seed(0)
+    amounts = [random.uniform(0.03, 5000) for _ in range(CONVERSIONS)]
+
+    def convert_amounts():
+        for index, amount in enumerate(amounts):
+            convert(amount, "USD", CONVERSION_CURRENCIES[index % len(CONVERSION_CURRENCIES)])
+
+    return [measure("currency_conversion", convert_amounts, CONVERSIONS)]
+
+
+def environment():
+    """Describe the environment the benchmarks ran in."""
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def main():
+    """Run the benchmark suite and write the results as JSON to the output file, or to
+    stdout if no output file is given.
+    """
+    argument_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argument_parser.add_argument("--output", help="write the results as JSON to this file")
+    argument_parser.add_argument(
+        "--fixtures", help="replay this fixture archive instead of generated price lists"
+    )
+    argument_parser.add_argument(
+        "--steam-page", nargs="*", default=[], help="saved Steam market search pages"
+    )
+    args = argument_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        results = (
+            csgotrader_benchmarks()
+            + steam_benchmarks(args.steam_page)
+            + scraper_benchmarks(data_dir, args.fixtures)
+            + price_log_benchmarks(data_dir)
+            + currency_conversion_benchmarks()
+        )
+
+    report = {"environment": environment(), "results": results}
+    if not args.output:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+    for result in results:
+        print(
+            f"{result['name']:<30} {result['best_seconds'] * 1000:10.2f} ms "
+            f"{result['best_seconds_per_operation'] * 1e6:12.2f} us/op"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -283,10 +283,10 @@ class MainFrame(ttk.Frame):
     def _toggle_use_proxy(self, enabled: bool):
         """Toggle whether the scraper should use proxy servers for requests."""
         proxy_api_key = config.proxy_api_key
-        if not proxy_api_key and enabled:
+        if not proxy_api_key and not config.proxy_urls and enabled:
             messagebox.showerror(
                 "Config Error",
-                "You need to enter a valid crawlbase API key into the configuration to use this feature.",
+                "You need to enter a valid crawlbase API key or your own proxy URLs into the configuration to use this feature.",
                 parent=self.parent,
             )
             return False
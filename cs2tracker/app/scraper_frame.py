@@ -4,8 +4,8 @@ from tkinter.filedialog import asksaveasfilename
 
 from tksheet import Sheet
 
+from cs2tracker.scraper.errors import ParsingError, SheetNotFoundError
 from cs2tracker.scraper.parser import Parser
-from cs2tracker.scraper.scraper import ParsingError, SheetNotFoundError
 from cs2tracker.util.tkinter import centered
 
 
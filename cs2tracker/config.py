@@ -4,6 +4,7 @@ from configparser import ConfigParser, ParsingError
 from urllib.parse import quote, unquote
 
 from cs2tracker.constants import (
+    CAPSULE_PAGES,
     CONFIG_FILE,
     INVENTORY_IMPORT_FILE,
 )
@@ -36,17 +37,49 @@ CUSTOM_SECTIONS = [
 
 UNEDITABLE_SECTIONS = ["App Settings", "User Settings"]
 
+# Sections whose items are listed together on one of the CAPSULE_PAGES search pages
+CAPSULE_PAGE_SECTIONS = ["Major Sticker Capsules"]
+
+# Optional App Settings that fall back to their defaults when they are missing
+BOOLEAN_APP_SETTINGS = [
+    "async_scraping",
+    "stream_price_lists",
+    "price_list_store",
+    "steam_bulk_search",
+    "fallback_parsers",
+    "run_stats",
+    "run_stats_log",
+]
+INTEGER_APP_SETTINGS = [
+    "max_concurrent_requests",
+    "http_cache_size_mb",
+    "daemon_port",
+    "daemon_refresh_minutes",
+]
+# Optional integer App Settings where 0 turns the feature off
+NON_NEGATIVE_APP_SETTINGS = [
+    "price_cache_ttl_minutes",
+    "parse_processes",
+]
+
 console = get_console()
 
 
 class ValidatedConfig(ConfigParser):
-    def __init__(self):
-        """Initialize the ValidatedConfig class."""
+    # pylint: disable=too-many-public-methods
+    def __init__(self, config_file=CONFIG_FILE):
+        """
+        Initialize the ValidatedConfig class.
+
+        :param config_file: The path of the configuration file to load.
+        """
         super().__init__(delimiters=("~"), interpolation=None)
         self.optionxform = str  # type: ignore
 
+        self.config_file = config_file
         self.valid = False
         self.last_error = None
+        self._capsule_page_index = None
         try:
             self.load_from_file()
         except (FileNotFoundError, ParsingError) as error:
@@ -64,12 +97,21 @@ class ValidatedConfig(ConfigParser):
             "App Settings", "discord_notifications", fallback=False
         )
         conversion_currency = self.get("App Settings", "conversion_currency", fallback="EUR")
+        optional_app_settings = {
+            option: value
+            for option, value in (
+                self.items("App Settings") if self.has_section("App Settings") else []
+            )
+            if option in BOOLEAN_APP_SETTINGS + INTEGER_APP_SETTINGS + NON_NEGATIVE_APP_SETTINGS
+        }
 
         self.clear()
         self.add_section("App Settings")
         self.set("App Settings", "use_proxy", str(use_proxy))
         self.set("App Settings", "discord_notifications", str(discord_notifications))
         self.set("App Settings", "conversion_currency", conversion_currency)
+        for option, value in optional_app_settings.items():
+            self.set("App Settings", option, value)
 
     def _validate_config_sections(self):
         """Validate that the configuration file has all required sections."""
@@ -80,6 +122,24 @@ class ValidatedConfig(ConfigParser):
             if not self.has_section(section):
                 raise ValueError(f"Missing '{section}' section in the configuration file.")
 
+    def _validate_optional_app_settings(self):
+        """Validate the values of the optional App Settings that are present."""
+        for option in BOOLEAN_APP_SETTINGS:
+            if self.get("App Settings", option, fallback="False") not in ("True", "False"):
+                raise ValueError(f"Reason: Invalid value for '{option}' in 'App Settings' section.")
+        for option in INTEGER_APP_SETTINGS:
+            if (
+                self.has_option("App Settings", option)
+                and int(self.get("App Settings", option)) < 1
+            ):
+                raise ValueError(f"Reason: Invalid value for '{option}' in 'App Settings' section.")
+        for option in NON_NEGATIVE_APP_SETTINGS:
+            if (
+                self.has_option("App Settings", option)
+                and int(self.get("App Settings", option)) < 0
+            ):
+                raise ValueError(f"Reason: Invalid value for '{option}' in 'App Settings' section.")
+
     def _validate_config_values(self):
         # pylint: disable=too-many-branches
         """Validate that the configuration file has valid values for all sections."""
@@ -95,6 +155,7 @@ class ValidatedConfig(ConfigParser):
                             raise ValueError(
                                 f"Reason: Invalid value for '{option}' in '{section}' section."
                             )
+                    self._validate_optional_app_settings()
                 elif section == "User Settings":
                     for option in ("proxy_api_key", "discord_webhook_url"):
                         if not self.has_option(section, option):
@@ -132,9 +193,22 @@ class ValidatedConfig(ConfigParser):
             self.last_error = error
 
     def load_from_file(self):
-        """Load the configuration file and validate it."""
+        """
+        Load the configuration file and validate it.
+
+        The file is parsed into a separate parser first, so that a file that can't be
+        parsed (e.g. while the editor is still writing it) leaves the current
+        configuration untouched.
+
+        :raises ParsingError: If the configuration file can't be parsed.
+        """
+        parsed_config = ConfigParser(delimiters=("~"), interpolation=None)
+        parsed_config.optionxform = str  # type: ignore
+        parsed_config.read(self.config_file)
+
+        self._capsule_page_index = None
         self.clear()
-        self.read(CONFIG_FILE)
+        self.read_dict(parsed_config)
         self._validate_config()
 
     def write_to_file(self):
@@ -144,7 +218,8 @@ class ValidatedConfig(ConfigParser):
         self._validate_config()
 
         if self.valid:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as config_file:
+            self._capsule_page_index = None
+            with open(self.config_file, "w", encoding="utf-8") as config_file:
                 self.write(config_file)
 
     def read_from_inventory_file(self):
@@ -237,6 +312,60 @@ class ValidatedConfig(ConfigParser):
                 return True
         return False
 
+    def item_hrefs(self):
+        """
+        Get the hrefs of all items in the configuration.
+
+        :return: A list of Steam market listing URLs.
+        """
+        item_hrefs = []
+        for section in self.sections():
+            if section in UNEDITABLE_SECTIONS:
+                continue
+            item_hrefs += self.options(section)
+        return item_hrefs
+
+    def _build_capsule_page_index(self):
+        """
+        Map the href of every sticker capsule in the configuration to the search page
+        in CAPSULE_PAGES that lists all capsules of its major.
+
+        :return: A dictionary of item hrefs and search page URLs.
+        """
+        majors = {
+            capsule_name.removesuffix(" Sticker Capsule"): page_url
+            for capsule_name, page_url in CAPSULE_PAGES.items()
+        }
+
+        capsule_page_index = {}
+        for section in CAPSULE_PAGE_SECTIONS:
+            if not self.has_section(section):
+                continue
+            for item_href in self.options(section):
+                item_name = unquote(item_href.split("/")[-1])
+                for major, page_url in majors.items():
+                    if major in item_name:
+                        capsule_page_index[item_href] = page_url
+                        break
+
+        return capsule_page_index
+
+    def capsule_page_url(self, item_href):
+        """
+        Get the search page that lists the given sticker capsule together with the
+        other capsules of its major.
+
+        The lookup index is built on first use and rebuilt after the configuration has
+        been loaded or written.
+
+        :param item_href: The href of the item.
+        :return: The URL of the search page, or None if the item is not a sticker
+            capsule with a shared search page.
+        """
+        if self._capsule_page_index is None:
+            self._capsule_page_index = self._build_capsule_page_index()
+        return self._capsule_page_index.get(item_href)
+
     @property
     def use_proxy(self):
         """Check if the application should use proxies for requests."""
@@ -252,11 +381,107 @@ class ValidatedConfig(ConfigParser):
         """Get the conversion currency for price calculations."""
         return self.get("App Settings", "conversion_currency", fallback="EUR")
 
+    @property
+    def async_scraping(self):
+        """Check if the scraper should fetch pages concurrently with the async
+        engine.
+        """
+        return self.getboolean("App Settings", "async_scraping", fallback=False)
+
+    @property
+    def max_concurrent_requests(self):
+        """Get the maximum number of requests the async engine runs at the same
+        time.
+        """
+        return self.getint("App Settings", "max_concurrent_requests", fallback=8)
+
+    @property
+    def stream_price_lists(self):
+        """Check if price lists should be scanned incrementally, keeping only the
+        entries of configured items.
+        """
+        return self.getboolean("App Settings", "stream_price_lists", fallback=False)
+
+    @property
+    def price_list_store(self):
+        """Check if price lists should be compiled into the on-disk price list store
+        and looked up from there.
+        """
+        return self.getboolean("App Settings", "price_list_store", fallback=False)
+
+    @property
+    def steam_bulk_search(self):
+        """Check if the prices of Steam items should be fetched with a paginated bulk
+        search before falling back to the search page of each item.
+        """
+        return self.getboolean("App Settings", "steam_bulk_search", fallback=False)
+
+    @property
+    def fallback_parsers(self):
+        """Check if prices that are missing from the CSGOTrader price lists should be
+        looked up with the Steam and Clash parsers instead.
+        """
+        return self.getboolean("App Settings", "fallback_parsers", fallback=False)
+
+    @property
+    def run_stats(self):
+        """Check if the timings and counters of each phase of a run should be printed
+        at the end of the run.
+        """
+        return self.getboolean("App Settings", "run_stats", fallback=False)
+
+    @property
+    def run_stats_log(self):
+        """Check if the timings and counters of each run should be appended to the run
+        statistics log.
+        """
+        return self.getboolean("App Settings", "run_stats_log", fallback=False)
+
+    @property
+    def http_cache_size_mb(self):
+        """Get the maximum size of the persistent HTTP cache in megabytes."""
+        return self.getint("App Settings", "http_cache_size_mb", fallback=256)
+
+    @property
+    def price_cache_ttl_minutes(self):
+        """Get how many minutes a scraped item price is reused before it is scraped
+        again (0 disables the item price cache).
+        """
+        return self.getint("App Settings", "price_cache_ttl_minutes", fallback=0)
+
+    @property
+    def parse_processes(self):
+        """Get how many worker processes parse the downloaded pages (0 parses them in
+        the scraper process).
+        """
+        return self.getint("App Settings", "parse_processes", fallback=0)
+
+    @property
+    def daemon_port(self):
+        """Get the local port the API of the scraper daemon listens on."""
+        return self.getint("App Settings", "daemon_port", fallback=8742)
+
+    @property
+    def daemon_refresh_minutes(self):
+        """Get how many minutes the scraper daemon waits between two scheduled runs."""
+        return self.getint("App Settings", "daemon_refresh_minutes", fallback=60)
+
     @property
     def proxy_api_key(self):
         """Get the API key for the proxy service."""
         return self.get("User Settings", "proxy_api_key", fallback="")
 
+    @property
+    def proxy_urls(self):
+        """Get the URLs of the user's own proxy servers."""
+        proxy_urls = self.get("User Settings", "proxy_urls", fallback="")
+        return [proxy_url.strip() for proxy_url in proxy_urls.split(",") if proxy_url.strip()]
+
+    @property
+    def metrics_file(self):
+        """Get the path of the OpenMetrics file that is written after every run."""
+        return self.get("User Settings", "metrics_file", fallback="")
+
     @property
     def discord_webhook_url(self):
         """Get the Discord webhook URL for notifications."""
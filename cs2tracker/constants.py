@@ -72,6 +72,11 @@ if RUNNING_IN_EXE:
     CONFIG_FILE = os.path.join(DATA_DIR, "config.ini")
     CONFIG_FILE_BACKUP = os.path.join(DATA_DIR, "config.ini.bak")
     OUTPUT_FILE = os.path.join(DATA_DIR, "output.csv")
+    ITEM_PRICE_LOGS_FILE = os.path.join(DATA_DIR, "item_prices.sqlite")
+    HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
+    PRICE_LIST_STORE_FILE = os.path.join(DATA_DIR, "price_lists.sqlite")
+    PRICE_CACHE_FILE = os.path.join(DATA_DIR, "price_cache.sqlite")
+    RUN_STATS_FILE = os.path.join(DATA_DIR, "run_stats.jsonl")
     INVENTORY_CONVERT_SCRIPT = os.path.join(DATA_DIR, "convert_inventory.js")
     INVENTORY_IMPORT_SCRIPT = os.path.join(DATA_DIR, "get_inventory.js")
     NODE_MODULES = os.path.join(DATA_DIR, "node_modules")
@@ -158,6 +163,11 @@ else:
     CONFIG_FILE = os.path.join(DATA_DIR, "config.ini")
     CONFIG_FILE_BACKUP = os.path.join(DATA_DIR, "config.ini.bak")
     OUTPUT_FILE = os.path.join(DATA_DIR, "output.csv")
+    ITEM_PRICE_LOGS_FILE = os.path.join(DATA_DIR, "item_prices.sqlite")
+    HTTP_CACHE_DIR = os.path.join(DATA_DIR, "http_cache")
+    PRICE_LIST_STORE_FILE = os.path.join(DATA_DIR, "price_lists.sqlite")
+    PRICE_CACHE_FILE = os.path.join(DATA_DIR, "price_cache.sqlite")
+    RUN_STATS_FILE = os.path.join(DATA_DIR, "run_stats.jsonl")
     INVENTORY_CONVERT_SCRIPT = os.path.join(DATA_DIR, "convert_inventory.js")
     INVENTORY_IMPORT_SCRIPT = os.path.join(DATA_DIR, "get_inventory.js")
     NODE_MODULES = os.path.join(DATA_DIR, "node_modules")
@@ -1,27 +1,33 @@
 import csv
+import os
+import sqlite3
+from contextlib import closing
 from datetime import datetime
 
 from cs2tracker.config import get_config
-from cs2tracker.constants import OUTPUT_FILE
-from cs2tracker.scraper.parser import Parser
+from cs2tracker.constants import ITEM_PRICE_LOGS_FILE, OUTPUT_FILE
+from cs2tracker.scraper.parser import Parser, PriceSource
 from cs2tracker.util.currency_conversion import convert, to_symbol
 
+# Size of the blocks that the most recent entries of the output file are read in
+TAIL_BLOCK_SIZE = 4096
+
 config = get_config()
 
 
 class PriceLogs:
     @classmethod
-    def _append_latest_calculation(cls, date, usd_totals):
+    def _append_latest_calculation(cls, date, usd_totals, log_file):
         """Append the first price calculation of the day."""
-        with open(OUTPUT_FILE, "a", newline="", encoding="utf-8") as price_logs:
+        with open(log_file, "a", newline="", encoding="utf-8") as price_logs:
             price_logs_writer = csv.writer(price_logs)
             price_entries_today = [f"{usd_total:.2f}$" for usd_total in usd_totals]
             price_logs_writer.writerow([date] + price_entries_today)
 
     @classmethod
-    def _replace_latest_calculation(cls, date, usd_totals):
+    def _replace_latest_calculation(cls, date, usd_totals, log_file):
         """Replace the last calculation of today with the most recent one of today."""
-        with open(OUTPUT_FILE, "r+", newline="", encoding="utf-8") as price_logs:
+        with open(log_file, "r+", newline="", encoding="utf-8") as price_logs:
             price_logs_reader = csv.reader(price_logs)
             rows = list(price_logs_reader)
             rows_without_today = rows[:-1]
@@ -34,7 +40,7 @@ class PriceLogs:
             price_logs_writer.writerow([date] + price_entries_today)
 
     @classmethod
-    def save(cls, usd_totals):
+    def save(cls, usd_totals, log_file=None):
         """
         Save the current date and total prices in USD to a CSV file.
 
@@ -42,22 +48,24 @@ class PriceLogs:
         today.
 
         :param usd_totals: The total prices in USD to save.
+        :param log_file: The output file to save to, if it is not the default one.
         :raises FileNotFoundError: If the output file does not exist.
         :raises IOError: If there is an error writing to the output file.
         """
-        with open(OUTPUT_FILE, "r", encoding="utf-8") as price_logs:
+        log_file = log_file or OUTPUT_FILE
+        with open(log_file, "r", encoding="utf-8") as price_logs:
             price_logs_reader = csv.reader(price_logs)
             rows = list(price_logs_reader)
             last_log_date = rows[-1][0] if rows else ""
 
         today = datetime.now().strftime("%Y-%m-%d")
         if last_log_date != today:
-            cls._append_latest_calculation(today, usd_totals)
+            cls._append_latest_calculation(today, usd_totals, log_file)
         else:
-            cls._replace_latest_calculation(today, usd_totals)
+            cls._replace_latest_calculation(today, usd_totals, log_file)
 
     @classmethod
-    def read(cls, newest_first=False, with_symbols=False):
+    def read(cls, newest_first=False, with_symbols=False, log_file=None):
         """
         Parse the output file to extract dates, dollar prices, and the converted
         currency prices. This data is used for drawing the plot of past prices.
@@ -65,6 +73,7 @@ class PriceLogs:
         :param newest_first: If True, the dates and totals will be returned in reverse
             order
         :param with_symbols: If True, the prices will be formatted with currency symbols
+        :param log_file: The output file to read from, if it is not the default one.
         :return: A tuple containing dates and a dictionary of totals for each price
             source.
         :raises FileNotFoundError: If the output file does not exist.
@@ -76,7 +85,7 @@ class PriceLogs:
             price_source: {"USD": [], conversion_currency: []} for price_source in Parser.SOURCES
         }
 
-        with open(OUTPUT_FILE, "r", encoding="utf-8") as price_logs:
+        with open(log_file or OUTPUT_FILE, "r", encoding="utf-8") as price_logs:
             price_logs_reader = csv.reader(price_logs)
             for row in price_logs_reader:
                 date, *usd_totals = row
@@ -112,6 +121,41 @@ class PriceLogs:
 
         return dates, totals
 
+    @classmethod
+    def tail(cls, rows, log_file=None):
+        """
+        Read the most recent entries of the output file, without reading the entries
+        before them.
+
+        :param rows: How many entries to read at most.
+        :param log_file: The output file to read from, if it is not the default one.
+        :return: A list of (date, usd_totals) tuples, newest first.
+        :raises FileNotFoundError: If the output file does not exist.
+        :raises IOError: If there is an error reading the output file.
+        """
+        with open(log_file or OUTPUT_FILE, "rb") as price_logs:
+            position = price_logs.seek(0, os.SEEK_END)
+            content = b""
+            # The last entry ends with a line break as well, so one more is needed
+            while position > 0 and content.count(b"\n") <= rows:
+                read_size = min(TAIL_BLOCK_SIZE, position)
+                position -= read_size
+                price_logs.seek(position)
+                content = price_logs.read(read_size) + content
+
+        lines = content.decode("utf-8").splitlines()
+        if position > 0:
+            # The first line was only partially read
+            lines = lines[1:]
+
+        entries = []
+        for date, *usd_totals in csv.reader(line for line in lines[-rows:] if line):
+            date = datetime.strptime(date, "%Y-%m-%d")
+            usd_totals = [float(price_usd.rstrip("$")) for price_usd in usd_totals]
+            entries.append((date, usd_totals))
+        entries.reverse()
+        return entries
+
     @classmethod
     def validate_file(cls, log_file_path):
         # pylint: disable=expression-not-assigned
@@ -141,3 +185,106 @@ class PriceLogs:
         """Checks if the price history is empty and returns True if it is."""
         with open(OUTPUT_FILE, "r", encoding="utf-8") as price_logs:
             return len(list(price_logs)) == 0
+
+
+class ItemPriceLogs:
+    """
+    The price history of every single item, stored next to the daily totals of the
+    output file.
+
+    Each run records the price and owned count of every item and price source. Like
+    the totals, only the most recent run of a day is kept. Prices are clustered by item,
+    price source and date, so that the history of an item is read with a single range
+    scan.
+    """
+
+    @classmethod
+    def _connect(cls, log_file=None):
+        """Open the item price log database and create its tables if necessary."""
+        connection = sqlite3.connect(log_file or ITEM_PRICE_LOGS_FILE)
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "item_id INTEGER PRIMARY KEY, item_href TEXT NOT NULL UNIQUE)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS item_prices ("
+                "item_id INTEGER NOT NULL, source TEXT NOT NULL, date TEXT NOT NULL, "
+                "price REAL NOT NULL, owned INTEGER NOT NULL, "
+                "PRIMARY KEY (item_id, source, date)) WITHOUT ROWID"
+            )
+            # Lets a run replace the prices of its day without scanning the whole history
+            connection.execute("CREATE INDEX IF NOT EXISTS item_prices_date ON item_prices (date)")
+        return connection
+
+    @classmethod
+    def save(cls, item_prices, log_file=None):
+        """
+        Save the prices of the current run with the current date.
+
+        This will replace all prices that have already been saved for today, including
+        those of items and price sources that are missing from the current run.
+
+        :param item_prices: An iterable of (item_href, price_source, price_usd, owned)
+            tuples.
+        :param log_file: The database to save to, if it is not the default one.
+        :raises sqlite3.Error: If there is an error writing to the database.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        item_prices = list(item_prices)
+
+        with closing(cls._connect(log_file)) as connection:
+            with connection:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO items (item_href) VALUES (?)",
+                    [(item_href,) for item_href in {item_price[0] for item_price in item_prices}],
+                )
+                item_ids = dict(connection.execute("SELECT item_href, item_id FROM items"))
+                connection.execute("DELETE FROM item_prices WHERE date = ?", (today,))
+                connection.executemany(
+                    "INSERT OR REPLACE INTO item_prices (item_id, source, date, price, owned) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (item_ids[item_href], price_source.value, today, price_usd, int(owned))
+                        for item_href, price_source, price_usd, owned in item_prices
+                    ],
+                )
+
+    @classmethod
+    def read(cls, item_href, price_source=None, start_date=None, end_date=None, log_file=None):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Read the price history of an item.
+
+        :param item_href: The href of the item.
+        :param price_source: Only read the prices of this price source if given.
+        :param start_date: Only read the prices from this date on if given.
+        :param end_date: Only read the prices up to and including this date if given.
+        :param log_file: The database to read from, if it is not the default one.
+        :return: A list of (date, price_source, price_usd, owned) tuples, ordered by
+            price source and date.
+        :raises sqlite3.Error: If there is an error reading from the database.
+        """
+        query = (
+            "SELECT date, source, price, owned FROM item_prices "
+            "WHERE item_id = (SELECT item_id FROM items WHERE item_href = ?)"
+        )
+        parameters = [item_href]
+        if price_source is not None:
+            query += " AND source = ?"
+            parameters.append(price_source.value)
+        if start_date is not None:
+            query += " AND date >= ?"
+            parameters.append(start_date.strftime("%Y-%m-%d"))
+        if end_date is not None:
+            query += " AND date <= ?"
+            parameters.append(end_date.strftime("%Y-%m-%d"))
+        query += " ORDER BY source, date"
+
+        with closing(cls._connect(log_file)) as connection:
+            rows = connection.execute(query, parameters).fetchall()
+
+        return [
+            (datetime.strptime(date, "%Y-%m-%d"), PriceSource(source), price_usd, owned)
+            for date, source, price_usd, owned in rows
+        ]
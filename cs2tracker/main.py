@@ -1,12 +1,59 @@
+import multiprocessing
 import sys
+from urllib.parse import unquote
 
 import urllib3
 
 from cs2tracker.app.app import Application
 from cs2tracker.constants import AUTHOR_STRING, BANNER, OS, OSType
+from cs2tracker.scraper.batch import BatchScraper
+from cs2tracker.scraper.daemon import DaemonClient, ScraperDaemon
+from cs2tracker.scraper.fixtures import FixtureMode
+from cs2tracker.scraper.parser import CSGOTraderParser
 from cs2tracker.scraper.scraper import Scraper
 from cs2tracker.util.padded_console import get_console
 
+FIXTURE_MODES = {
+    "--record-fixtures": FixtureMode.RECORD,
+    "--replay-fixtures": FixtureMode.REPLAY,
+}
+
+
+def lookup_items(item_hrefs):
+    """
+    Print the stored prices of items from all price sources without downloading
+    anything.
+
+    :param item_hrefs: The market names or listing URLs of the items.
+    """
+    console = get_console()
+    for item_href in item_hrefs:
+        console.title(unquote(item_href.split("/")[-1]), "magenta")
+        for price_source in CSGOTraderParser.SOURCES:
+            try:
+                price_usd = CSGOTraderParser.lookup_stored_item_price(item_href, price_source)
+                console.print(f"{price_source.name.title():<10}: ${price_usd:.2f}")
+            except ValueError as error:
+                console.error(f"{error}")
+
+
+def scrape_with_fixtures(fixture_option):
+    """
+    Run the scraper while recording its pages into a fixture archive, or against the
+    pages of one without sending any requests.
+
+    :param fixture_option: The command line option that selects the fixture mode. The
+        argument after it is the path of the fixture archive.
+    """
+    archive_index = sys.argv.index(fixture_option) + 1
+    if archive_index == len(sys.argv):
+        get_console().error(f"{fixture_option} needs the path of a fixture archive.")
+        return
+
+    scraper = Scraper()
+    scraper.use_fixtures(sys.argv[archive_index], FIXTURE_MODES[fixture_option])
+    scraper.scrape_prices()
+
 
 def main():
     """
@@ -16,6 +63,9 @@ def main():
     application.
     """
 
+    # Worker processes of the parse pool start the frozen executable again
+    multiprocessing.freeze_support()
+
     # Disable warnings for proxy requests
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -26,7 +76,41 @@ def main():
     console = get_console()
     console.print(f"[bold yellow]{BANNER}\n{AUTHOR_STRING}\n")
 
+    if "--clear-cache" in sys.argv:
+        scraper = Scraper()
+        scraper.clear_cache()
+        return
+
+    if "--batch" in sys.argv:
+        # All arguments after --batch are the config files of the portfolios
+        first_config_file = sys.argv.index("--batch") + 1
+        batch_scraper = BatchScraper(sys.argv[first_config_file:])
+        batch_scraper.scrape_prices()
+        return
+
+    if "--lookup" in sys.argv:
+        # All arguments after --lookup are the market names or listing URLs of the items
+        first_item = sys.argv.index("--lookup") + 1
+        lookup_items(sys.argv[first_item:])
+        return
+
+    fixture_option = next((option for option in FIXTURE_MODES if option in sys.argv), None)
+    if fixture_option is not None:
+        scrape_with_fixtures(fixture_option)
+        return
+
+    if "--daemon" in sys.argv:
+        daemon = ScraperDaemon()
+        daemon.serve_forever()
+        return
+
     if "--only-scrape" in sys.argv:
+        # Let a running daemon do the work with its warm session and parsed pages
+        if DaemonClient.is_running():
+            DaemonClient.trigger_run()
+            console.info("Triggered a run of the scraper daemon.")
+            return
+
         scraper = Scraper()
         scraper.scrape_prices()
     else:
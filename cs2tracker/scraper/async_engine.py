@@ -0,0 +1,167 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from cs2tracker.config import get_config
+from cs2tracker.scraper.errors import (
+    SOURCE_ERRORS,
+    SheetNotFoundError,
+    UnexpectedError,
+)
+from cs2tracker.util.padded_console import get_console
+
+console = get_console()
+config = get_config()
+
+
+class AsyncScrapingMixin:
+    """
+    The async engine of the Scraper, which overlaps the requests of all items and price
+    sources instead of scraping one item after another.
+
+    It relies on the session, parser, stats and price bookkeeping of the Scraper class
+    that it is mixed into.
+    """
+
+    async def _scrape_all_item_prices_async(self, update_sheet_callback=None):
+        # pylint: disable=too-many-locals
+        """
+        Scrape the prices of all owned items with overlapping requests across items and
+        price sources.
+
+        Pages are fetched and indexed on a pool of worker threads that share the
+        scraper's pooled session, while the results are processed on the event loop so
+        that totals, console output and the sheet callback are only ever touched from
+        the calling thread. Results are processed in the order of the config as soon as
+        the items before them are done, so the sheet keeps the same order on every run.
+
+        :param update_sheet_callback: Optional callback function to update a tksheet
+            that is displayed in the GUI with the latest scraper price calculation.
+        """
+        # Requests to throttled hosts are spaced out by the rate limiter of the session,
+        # so every worker can send requests without further coordination
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_requests)
+        page_index_futures = {}
+
+        async def get_page_index(item_page_url, price_source, parser=None):
+            # Items that share a page wait for the same request instead of sending their own
+            index_key = (item_page_url, price_source)
+            if index_key not in page_index_futures:
+                page_index_futures[index_key] = loop.run_in_executor(
+                    executor, self._get_item_page_index, item_page_url, price_source, parser
+                )
+            return await page_index_futures[index_key]
+
+        async def scrape_fallback_item_price(fallback_parser, item_href, price_source):
+            item_page_url = fallback_parser.get_item_page_url(item_href, price_source)
+            page_index = await get_page_index(item_page_url, price_source, fallback_parser)
+            return fallback_parser.lookup_item_price(page_index, item_href, price_source)
+
+        async def scrape_item_price(item_href, price_source):
+            cached_price_usd = self._cached_item_price(item_href, price_source)
+            if cached_price_usd is not None:
+                return cached_price_usd, True
+            item_page_url = self.parser.get_item_page_url(item_href, price_source)
+            page_index = await get_page_index(item_page_url, price_source)
+            try:
+                return self.parser.lookup_item_price(page_index, item_href, price_source), False
+            except ValueError as error:
+                fallback_parsers = self.parser.FALLBACK_PARSERS.get(price_source)
+                if not fallback_parsers:
+                    raise
+                price_usd = self._prefetched_fallback_item_price(
+                    fallback_parsers, item_href, price_source
+                )
+                if price_usd is None:
+                    fallback_prices = await asyncio.gather(
+                        *(
+                            scrape_fallback_item_price(fallback_parser, item_href, price_source)
+                            for fallback_parser in fallback_parsers
+                        ),
+                        return_exceptions=True,
+                    )
+                    price_usd = self._first_fallback_item_price(fallback_prices, error)
+                return price_usd, False
+
+        async def scrape_item(item_href, owned):
+            try:
+                item_prices = await asyncio.gather(
+                    *(
+                        scrape_item_price(item_href, price_source)
+                        for price_source in self.parser.SOURCES
+                    ),
+                    return_exceptions=True,
+                )
+                for item_price in item_prices:
+                    if isinstance(item_price, Exception) and not isinstance(
+                        item_price, SOURCE_ERRORS
+                    ):
+                        raise item_price
+                return item_href, owned, item_prices, None
+            except Exception as error:
+                return item_href, owned, None, error
+
+        tasks = [
+            asyncio.ensure_future(scrape_item(item_href, owned))
+            for item_href, owned in self._owned_items()
+        ]
+        try:
+            for task in tasks:
+                item_href, owned, item_prices, error = await task
+                if self.error_stack and isinstance(self.error_stack[-1], SheetNotFoundError):
+                    break
+                self._record_item_prices_async(
+                    item_href, owned, item_prices, error, update_sheet_callback
+                )
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Pages that are still being fetched would otherwise write to the page indexes
+            # and the error stack during the next phase of the run
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _record_item_prices_async(
+        self, item_href, owned, item_prices, error, update_sheet_callback=None
+    ):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Add the prices of an item that were scraped by the async engine to the totals,
+        print them and insert them into the sheet.
+
+        :param item_href: The url of the steamcommunity market listing of the item
+        :param owned: How many of this item the user owns
+        :param item_prices: The price and whether it was taken from the item price cache,
+            or the error, of each price source
+        :param error: The error that stopped the item from being scraped, if any
+        :param update_sheet_callback: Optional callback function to update a tksheet
+            that is displayed in the GUI with the latest scraper price calculation.
+        """
+        item_name = config.option_to_name(item_href, href=True)
+        with self.stats.phase("console"):
+            console.title(item_name, "magenta")
+
+        if error is not None:
+            self._error(UnexpectedError(error))
+            return
+
+        prices = []
+        cached = False
+        for price_source, item_price in zip(self.parser.SOURCES, item_prices):
+            if isinstance(item_price, SOURCE_ERRORS):
+                prices += [0.0, 0.0]
+                self._report_source_error(item_price, price_source)
+                continue
+            price_usd, price_cached = item_price
+            if not price_cached:
+                self.scraped_prices.append((item_href, price_source, price_usd))
+            prices += self._add_item_price(
+                item_href, price_source, owned, price_usd, cached=price_cached
+            )
+            cached = cached or price_cached
+
+        if update_sheet_callback:
+            try:
+                update_sheet_callback([self._sheet_item_name(item_name, cached), owned] + prices)
+            except Exception:
+                self._error(SheetNotFoundError())
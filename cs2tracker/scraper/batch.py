@@ -0,0 +1,297 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from requests import RequestException
+from tenacity import RetryError
+
+from cs2tracker.config import ValidatedConfig, get_config
+from cs2tracker.logs import PriceLogs
+from cs2tracker.scraper.discord_notifier import DiscordNotifier
+from cs2tracker.scraper.errors import ConfigError, ParsingError, PortfolioError
+from cs2tracker.scraper.scraper import Scraper
+from cs2tracker.util.currency_conversion import convert, to_symbol
+from cs2tracker.util.padded_console import get_console
+
+console = get_console()
+config = get_config()
+
+
+def evaluate_owned_items(parser, owned_items):
+    """
+    Calculate the totals of owned items from the indexes of the pages they are found on.
+
+    This runs in a worker process if the parse pool is enabled. Shared price lists
+    among the page indexes are attached to in the worker instead of being copied.
+
+    :param parser: The parser the page indexes belong to.
+    :param owned_items: The href, the owned count and the page indexes by price source
+        of each item. The index of a page that could not be loaded is None.
+    :return: The totals in USD by price source and the messages of the prices that
+        could not be found.
+    """
+    errors = []
+    usd_totals = {price_source: 0.0 for price_source in parser.SOURCES}
+    for item_href, owned, page_indexes in owned_items:
+        for price_source, page_index in page_indexes.items():
+            if page_index is None:
+                errors.append(f"{price_source.name.title()}: page unavailable")
+                continue
+            try:
+                price_usd = parser.lookup_item_price(page_index, item_href, price_source)
+            except ValueError as error:
+                errors.append(str(error))
+                continue
+            usd_totals[price_source] += round(owned * price_usd, 2)
+
+    return usd_totals, errors
+
+
+class Portfolio:
+    """The items of a single account, loaded from its own config file, and their
+    totals.
+    """
+
+    def __init__(self, config_file):
+        """
+        Initialize the Portfolio class.
+
+        :param config_file: The path of the config file of the account. Its price logs
+            are saved next to it, in a CSV file with the same name.
+        """
+        self.config = ValidatedConfig(config_file)
+        self.name = Path(config_file).stem
+        self.log_file = os.path.splitext(config_file)[0] + ".csv"
+        self.totals = {}
+        self.errors = []
+
+    def owned_items(self):
+        """Get the hrefs and owned counts of all items of the portfolio that are owned."""
+        return [
+            (item_href, int(owned))
+            for section in self.config.sections()
+            if section not in ("User Settings", "App Settings")
+            for item_href, owned in self.config.items(section)
+            if int(owned) > 0
+        ]
+
+
+class BatchScraper(Scraper):
+    """
+    Scrape the prices of many portfolios, each with its own config file, in one run.
+
+    The pages of all portfolios are collected first, so that every distinct page is
+    downloaded and parsed only once, no matter how many portfolios share it. The
+    portfolios are then evaluated in parallel from the shared page indexes, which
+    makes the run time grow with the number of distinct pages rather than with the
+    number of portfolios.
+
+    Requests go through the session, proxies, rate limits, circuit breakers and Discord
+    webhook of the main config, whose App Settings apply to the whole batch.
+    """
+
+    def __init__(self, config_files):
+        """
+        Initialize the BatchScraper class.
+
+        :param config_files: The paths of the config files of the portfolios.
+        """
+        super().__init__()
+        self.portfolios = [Portfolio(config_file) for config_file in config_files]
+        self.page_errors = {}
+
+    def scrape_prices(self, update_sheet_callback=None):
+        """
+        Scrape the pages of all portfolios once, then calculate, print and save the
+        totals of every portfolio.
+
+        :param update_sheet_callback: Unused, portfolios of a batch are not shown in the
+            GUI.
+        """
+        _ = update_sheet_callback
+        if not config.valid:
+            self._error(ConfigError())
+            return
+
+        self._prepare_new_run()
+        self.page_errors.clear()
+
+        portfolios = []
+        for portfolio in self.portfolios:
+            if portfolio.config.valid:
+                portfolios.append(portfolio)
+            else:
+                console.error(f"Skipping {portfolio.name}: {portfolio.config.last_error}")
+
+        with self.stats.phase("run"):
+            with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+                with self.stats.phase("fetch pages"):
+                    pages = self._distinct_pages(portfolios)
+                    list(executor.map(lambda page: self._index_page(*page), pages.items()))
+                with self.stats.phase("evaluate portfolios"):
+                    portfolio_errors = list(executor.map(self._evaluate_portfolio, portfolios))
+
+            # The errors are added here, so that the error stack is only ever touched from
+            # the calling thread
+            for errors in portfolio_errors:
+                for error in errors:
+                    self._error(error)
+            portfolios = [portfolio for portfolio in portfolios if portfolio.totals]
+            self._add_portfolio_totals(portfolios)
+
+            self.session.evict()
+            with self.stats.phase("console"):
+                for portfolio in portfolios:
+                    self._print_portfolio(portfolio)
+                self._print_circuit_breakers()
+            with self.stats.phase("discord"):
+                self._send_portfolio_notifications(portfolios)
+
+        self._report_run()
+
+    def _add_portfolio_totals(self, portfolios):
+        """
+        Sum up the totals of all portfolios in the totals of the batch, which are
+        exported as the value of the whole batch.
+
+        :param portfolios: The evaluated portfolios.
+        """
+        for price_source, totals in self.totals.items():
+            totals["USD"] = round(
+                sum(portfolio.totals[price_source]["USD"] for portfolio in portfolios), 2
+            )
+            totals[self.conversion_currency] = convert(
+                totals["USD"], "USD", self.conversion_currency
+            )
+
+    def _distinct_pages(self, portfolios):
+        """
+        Collect the distinct pages of all portfolios.
+
+        :param portfolios: The portfolios to collect the pages of.
+        :return: A dictionary of (page URL, price source) keys and the hrefs of all
+            items that are looked up on each page.
+        """
+        pages = {}
+        for portfolio in portfolios:
+            for item_href, _ in portfolio.owned_items():
+                for price_source in self.parser.SOURCES:
+                    item_page_url = self.parser.get_item_page_url(item_href, price_source)
+                    pages.setdefault((item_page_url, price_source), set()).add(item_href)
+        return pages
+
+    def _index_page(self, page_key, item_hrefs):
+        """
+        Download and parse a page that is shared by the portfolios.
+
+        :param page_key: The URL and price source of the page.
+        :param item_hrefs: The hrefs of the items of all portfolios on the page.
+        """
+        item_page_url, price_source = page_key
+        circuit_breaker = self.circuit_breakers.get(self.parser, price_source)
+        try:
+            item_page = self._get_page(item_page_url, circuit_breaker)
+            with self.stats.phase("parse", circuit_breaker.name):
+                # The page index has to hold the items of every portfolio, not only
+                # those of the main config
+                page_index = self._parse_item_page(item_page, price_source, self.parser, item_hrefs)
+            with self.lock:
+                self.page_indexes[page_key] = page_index
+        except (ValueError, RequestException, RetryError) as error:
+            with self.lock:
+                self.page_errors[page_key] = error
+
+    def _evaluate_portfolio(self, portfolio):
+        """
+        Calculate the totals of a portfolio from the shared page indexes and save them
+        to the price logs of the portfolio.
+
+        A portfolio that can't be evaluated is left without totals, so that it doesn't
+        hold up the other portfolios of the batch.
+
+        :param portfolio: The portfolio to evaluate.
+        :return: The errors of the portfolio, for the caller to add to the error stack.
+        """
+        try:
+            usd_totals = self._portfolio_usd_totals(portfolio)
+        except Exception as error:
+            portfolio.totals = {}
+            portfolio.errors = []
+            return [PortfolioError(portfolio.name, error)]
+
+        conversion_currency = portfolio.config.conversion_currency
+        portfolio.totals = {
+            price_source: {
+                "USD": usd_total,
+                conversion_currency: convert(usd_total, "USD", conversion_currency),
+            }
+            for price_source, usd_total in usd_totals.items()
+        }
+        errors = [ParsingError(f"{portfolio.name}: {message}") for message in portfolio.errors]
+
+        try:
+            Path(portfolio.log_file).touch()
+            PriceLogs.save(list(usd_totals.values()), portfolio.log_file)
+        except OSError as error:
+            errors.append(PortfolioError(portfolio.name, error))
+        return errors
+
+    def _portfolio_usd_totals(self, portfolio):
+        """
+        Calculate the totals of a portfolio in USD from the shared page indexes.
+
+        :param portfolio: The portfolio to evaluate.
+        :return: The totals in USD by price source.
+        """
+        # Pickling the items for a worker process sends each page index only once
+        owned_items = [
+            (
+                item_href,
+                owned,
+                {
+                    price_source: self.page_indexes.get(
+                        (self.parser.get_item_page_url(item_href, price_source), price_source)
+                    )
+                    for price_source in self.parser.SOURCES
+                },
+            )
+            for item_href, owned in portfolio.owned_items()
+        ]
+
+        # Indexes of the price list store are views of a database connection, which
+        # can't be sent to a worker process
+        if self.parse_pool and not config.price_list_store:
+            usd_totals, portfolio.errors = self.parse_pool.run(
+                evaluate_owned_items, self.parser, owned_items
+            )
+        else:
+            usd_totals, portfolio.errors = evaluate_owned_items(self.parser, owned_items)
+
+        return usd_totals
+
+    def _send_portfolio_notifications(self, portfolios):
+        """Queue the totals of every portfolio for a single Discord message if
+        notifications are enabled in the main config file.
+        """
+        discord_webhook_url = config.discord_webhook_url
+
+        if config.discord_notifications and discord_webhook_url and portfolios:
+            DiscordNotifier.notify_portfolios(
+                discord_webhook_url,
+                [
+                    (portfolio.name, portfolio.totals, portfolio.config.conversion_currency)
+                    for portfolio in portfolios
+                ],
+            )
+
+    def _print_portfolio(self, portfolio):
+        """Print the totals and the number of errors of a portfolio."""
+        console.title(portfolio.name, "magenta")
+        conversion_currency = portfolio.config.conversion_currency
+        for price_source, totals in portfolio.totals.items():
+            console.print(
+                f"{price_source.name.title():<10}: ${totals['USD']:.2f}  "
+                f"{to_symbol(conversion_currency)}{totals[conversion_currency]:.2f}"
+            )
+        if portfolio.errors:
+            console.error(f"{len(portfolio.errors)} prices could not be found.")
@@ -0,0 +1,146 @@
+import time
+from enum import Enum
+from threading import Lock
+
+from requests import RequestException
+
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN = 30.0
+RETRY_BUDGET_MIN_RETRIES = 10
+RETRY_BUDGET_RATIO = 0.2
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(RequestException):
+    """Raised instead of sending a request to a price source that is unavailable."""
+
+
+class CircuitBreaker:
+    # pylint: disable=too-many-instance-attributes
+    """
+    Stop sending requests to a price source once it is clearly unavailable.
+
+    After CIRCUIT_FAILURE_THRESHOLD pages of the source failed in a row (each after
+    all of its retries), the circuit opens and further requests fail right away. Once
+    CIRCUIT_COOLDOWN seconds have passed, a single trial request is let through, which
+    closes the circuit again if it succeeds.
+
+    Retries of the source are limited by a budget that grows with the number of
+    requests, so that a failing source can't multiply its requests by the number of
+    attempts per page.
+    """
+
+    def __init__(self, name):
+        """
+        Initialize the CircuitBreaker class.
+
+        :param name: The name of the price source, used in messages.
+        """
+        self.lock = Lock()
+        self.name = name
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+
+    def before_request(self):
+        """
+        Check if a page of the source may be requested.
+
+        :raises CircuitOpenError: If the circuit is open.
+        """
+        with self.lock:
+            if self.state == CircuitState.HALF_OPEN:
+                raise CircuitOpenError(f"{self.name} is unavailable.")
+            if self.state == CircuitState.OPEN:
+                if time.monotonic() - self.opened_at < CIRCUIT_COOLDOWN:
+                    raise CircuitOpenError(f"{self.name} is unavailable.")
+                self.state = CircuitState.HALF_OPEN
+            self.requests += 1
+
+    def stop_retrying(self, retry_state):
+        """
+        Decide whether a failed page request may be retried, taking the retry from the
+        budget if it may. This is used as a tenacity stop condition.
+
+        :param retry_state: The tenacity retry state of the request.
+        :return: True if the request must not be retried, False otherwise.
+        """
+        _ = retry_state
+        with self.lock:
+            # The trial request of a half-open circuit only gets a single attempt
+            if self.state != CircuitState.CLOSED:
+                return True
+            if self.retries >= RETRY_BUDGET_MIN_RETRIES + RETRY_BUDGET_RATIO * self.requests:
+                return True
+            self.retries += 1
+            return False
+
+    def record_success(self):
+        """Close the circuit after a page of the source was loaded."""
+        with self.lock:
+            self.state = CircuitState.CLOSED
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        """Count a page of the source that could not be loaded and open the circuit if
+        too many failed in a row.
+        """
+        with self.lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if (
+                self.state == CircuitState.HALF_OPEN
+                or self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD
+            ):
+                self.state = CircuitState.OPEN
+                self.opened_at = time.monotonic()
+
+    def summary(self):
+        """Get a one-line summary of the state of the circuit and its requests."""
+        with self.lock:
+            return (
+                f"{self.name:<22}: {self.state.value:<9} {self.requests} requests, "
+                f"{self.failures} failed, {self.retries} retries"
+            )
+
+
+class CircuitBreakers:
+    """The circuit breakers of all price sources that are requested during a run."""
+
+    def __init__(self):
+        """Initialize the CircuitBreakers class."""
+        self.lock = Lock()
+        self.breakers = {}
+
+    def reset(self):
+        """Forget the state of all circuit breakers."""
+        with self.lock:
+            self.breakers = {}
+
+    def get(self, parser, price_source):
+        """
+        Get the circuit breaker of a price source of a parser, creating it on first use.
+
+        :param parser: The parser that requests the pages of the source.
+        :param price_source: The price source.
+        :return: A CircuitBreaker instance.
+        """
+        with self.lock:
+            key = (parser, price_source)
+            if key not in self.breakers:
+                parser_name = parser.__name__.removesuffix("Parser")
+                self.breakers[key] = CircuitBreaker(f"{price_source.name.title()} ({parser_name})")
+            return self.breakers[key]
+
+    def __iter__(self):
+        """Iterate over the circuit breakers in the order they were created."""
+        with self.lock:
+            return iter(list(self.breakers.values()))
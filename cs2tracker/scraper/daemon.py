@@ -0,0 +1,243 @@
+import json
+import os
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.exceptions import RequestException
+
+from cs2tracker.config import get_config
+from cs2tracker.scraper.scraper import Scraper
+from cs2tracker.util.padded_console import get_console
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_CLIENT_TIMEOUT = 5
+
+console = get_console()
+config = get_config()
+
+
+class ScraperDaemon:
+    # pylint: disable=too-many-instance-attributes
+    """
+    A long-running scraper that keeps its session, parsed pages and the configuration
+    in memory, refreshes the prices on a schedule and answers queries about the most
+    recent run over a local HTTP API.
+
+    Endpoints:
+
+    - ``GET /totals``: The totals and errors of the most recent run.
+    - ``GET /prices``: The item prices of the most recent run, optionally filtered by
+      ``?item_href=``.
+    - ``POST /run``: Trigger a run. Runs that are triggered while one is in progress
+      are coalesced into a single follow-up run.
+    """
+
+    def __init__(self):
+        """Initialize the ScraperDaemon class."""
+        self.scraper = Scraper()
+        self.scraper.retain_page_indexes = True
+        self.lock = Lock()
+        self.run_requested = Event()
+        self.stopped = Event()
+        self.config_mtime = self._config_mtime()
+        self.running = False
+        self.last_run = None
+        self.totals = {}
+        self.prices = []
+        self.errors = []
+
+    def _config_mtime(self):
+        """Get the modification time of the config file."""
+        try:
+            return os.path.getmtime(config.config_file)
+        except OSError:
+            return None
+
+    def _reload_config_if_changed(self):
+        """Reload the configuration if the config file was changed since the last
+        run.
+        """
+        config_mtime = self._config_mtime()
+        if config_mtime != self.config_mtime:
+            config.load_from_file()
+            # A config that could not be read is read again before the next run
+            self.config_mtime = config_mtime
+            # Page indexes may depend on the configured items
+            self.scraper.retained_page_indexes.clear()
+            console.info("Reloaded the changed configuration.")
+
+    def run(self):
+        """
+        Run the scraper once and publish the results of the run.
+
+        Errors that end a run early (e.g. a config file that is read while the editor
+        is still writing it) are reported with the results, so that the daemon keeps
+        running.
+        """
+        with self.lock:
+            self.running = True
+
+        run_error = None
+        try:
+            self._reload_config_if_changed()
+            self.scraper.scrape_prices()
+        except Exception as error:
+            run_error = f"The run failed: {error}"
+            console.error(run_error)
+        finally:
+            with self.lock:
+                self.running = False
+                self.last_run = datetime.now().isoformat(timespec="seconds")
+                self.totals = {
+                    price_source.name.lower(): totals
+                    for price_source, totals in self.scraper.totals.items()
+                }
+                self.prices = [
+                    {
+                        "item_href": item_href,
+                        "source": price_source.name.lower(),
+                        "price_usd": price_usd,
+                        "owned": int(owned),
+                    }
+                    for item_href, price_source, price_usd, owned in self.scraper.item_prices
+                ]
+                self.errors = [error.message for error in self.scraper.error_stack]
+                if run_error is not None:
+                    self.errors.append(run_error)
+
+    def request_run(self):
+        """Schedule a run as soon as the current one, if any, has finished."""
+        self.run_requested.set()
+
+    def status(self):
+        """Get the totals and errors of the most recent run."""
+        with self.lock:
+            return {
+                "running": self.running,
+                "last_run": self.last_run,
+                "conversion_currency": self.scraper.conversion_currency,
+                "totals": self.totals,
+                "errors": self.errors,
+            }
+
+    def item_prices(self, item_href=None):
+        """
+        Get the item prices of the most recent run.
+
+        :param item_href: Only get the prices of this item if given.
+        """
+        with self.lock:
+            return [
+                item_price
+                for item_price in self.prices
+                if item_href is None or item_price["item_href"] == item_href
+            ]
+
+    def serve_forever(self):
+        """Start the API server and run the scraper on schedule until interrupted."""
+        server = ThreadingHTTPServer((DAEMON_HOST, config.daemon_port), DaemonRequestHandler)
+        server.daemon = self  # type: ignore
+        Thread(target=server.serve_forever, daemon=True).start()
+        console.info(f"Scraper daemon listening on http://{DAEMON_HOST}:{config.daemon_port}")
+
+        self.request_run()
+        try:
+            while not self.stopped.is_set():
+                self.run_requested.wait(timeout=config.daemon_refresh_minutes * 60)
+                self.run_requested.clear()
+                if not self.stopped.is_set():
+                    self.run()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def stop(self):
+        """Stop the daemon after the current run."""
+        self.stopped.set()
+        self.run_requested.set()
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    def _send_json(self, data, status=200):
+        """Send a JSON response."""
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer queries about the most recent run."""
+        daemon = self.server.daemon  # type: ignore
+        url = urlparse(self.path)
+        if url.path == "/totals":
+            self._send_json(daemon.status())
+        elif url.path == "/prices":
+            item_href = parse_qs(url.query).get("item_href", [None])[0]
+            self._send_json(daemon.item_prices(item_href))
+        else:
+            self._send_json({"error": "Not found"}, status=404)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Trigger a run."""
+        daemon = self.server.daemon  # type: ignore
+        if urlparse(self.path).path == "/run":
+            daemon.request_run()
+            self._send_json({"scheduled": True}, status=202)
+        else:
+            self._send_json({"error": "Not found"}, status=404)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Don't log every request to the console."""
+
+
+class DaemonClient:
+    @classmethod
+    def _request(cls, method, path, params=None):
+        """
+        Send a request to the scraper daemon.
+
+        :param method: The HTTP method of the request.
+        :param path: The path of the endpoint.
+        :param params: Optional query parameters.
+        :return: The decoded JSON response.
+        :raises RequestException: If the daemon can't be reached.
+        """
+        response = requests.request(
+            method,
+            f"http://{DAEMON_HOST}:{config.daemon_port}{path}",
+            params=params,
+            timeout=DAEMON_CLIENT_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    @classmethod
+    def is_running(cls):
+        """Check if a scraper daemon is listening on the configured port."""
+        try:
+            cls._request("GET", "/totals")
+            return True
+        except (RequestException, ValueError):
+            return False
+
+    @classmethod
+    def totals(cls):
+        """Get the totals and errors of the most recent run of the daemon."""
+        return cls._request("GET", "/totals")
+
+    @classmethod
+    def item_prices(cls, item_href=None):
+        """Get the item prices of the most recent run of the daemon."""
+        return cls._request("GET", "/prices", {"item_href": item_href} if item_href else None)
+
+    @classmethod
+    def trigger_run(cls):
+        """Ask the daemon to run the scraper as soon as possible."""
+        return cls._request("POST", "/run")
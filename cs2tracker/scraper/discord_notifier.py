@@ -1,28 +1,278 @@
+import atexit
+import time
+from datetime import datetime
+from threading import Condition, Lock, Thread
+
 import requests
 from requests.exceptions import RequestException
 
-from cs2tracker.config import get_config
 from cs2tracker.logs import PriceLogs
+from cs2tracker.scraper.parser import Parser
+from cs2tracker.util.currency_conversion import convert, to_symbol
 from cs2tracker.util.padded_console import get_console
 
 DC_WEBHOOK_USERNAME = "CS2Tracker"
 DC_WEBHOOK_AVATAR_URL = "https://img.icons8.com/?size=100&id=uWQJp2tLXUH6&format=png&color=000000"
 DC_RECENT_HISTORY_LIMIT = 5
+DC_MAX_EMBEDS_PER_MESSAGE = 10
+DC_MAX_ATTEMPTS = 5
+DC_RETRY_BACKOFF_SECONDS = 2
+DC_FLUSH_TIMEOUT_SECONDS = 30
 
 console = get_console()
-config = get_config()
+
+
+class NotificationQueue:
+    """
+    Send Discord notifications from a background thread, so that a slow or rate
+    limited webhook never holds up a run.
+
+    Embeds that are queued for a webhook while an earlier message is still waiting to
+    be sent are coalesced into a single message, and a newer embed replaces a queued
+    embed with the same title. The thread waits out the rate limits that the webhook
+    announces in its X-RateLimit-* headers and 429 responses, and retries messages that
+    failed with a network or server error.
+    """
+
+    def __init__(self):
+        """Initialize the NotificationQueue class."""
+        self.condition = Condition()
+        self.pending = {}
+        self.not_before = {}
+        self.attempts = {}
+        self.sending = False
+        self.thread = None
+        # A one-off run exits right after saving its results, so the queue gets a
+        # bounded amount of time to deliver what is left
+        atexit.register(self.flush)
+
+    def put(self, webhook_url, embeds):
+        """
+        Queue embeds to be sent to a webhook.
+
+        :param webhook_url: The Discord webhook URL to send the embeds to.
+        :param embeds: The embeds to send.
+        """
+        with self.condition:
+            pending_embeds = self.pending.setdefault(webhook_url, {})
+            for embed in embeds:
+                pending_embeds[embed["title"]] = embed
+            if self.thread is None:
+                self.thread = Thread(target=self._send_pending, daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def flush(self, timeout=DC_FLUSH_TIMEOUT_SECONDS):
+        """
+        Wait until all queued embeds have been sent.
+
+        :param timeout: How many seconds to wait at most.
+        :return: True if nothing is left to send, False otherwise.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.pending or self.sending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    console.error("Discord notifications could not be sent in time.\n")
+                    return False
+                self.condition.wait(remaining)
+        return True
+
+    def _next_message(self):
+        """
+        Wait for the next message that may be sent without exceeding a rate limit.
+
+        :return: The webhook URL and the embeds of the message.
+        """
+        with self.condition:
+            while True:
+                if not self.pending:
+                    self.condition.wait()
+                    continue
+                webhook_url = min(self.pending, key=lambda url: self.not_before.get(url, 0.0))
+                wait_seconds = self.not_before.get(webhook_url, 0.0) - time.monotonic()
+                if wait_seconds > 0:
+                    self.condition.wait(wait_seconds)
+                    continue
+
+                pending_embeds = list(self.pending.pop(webhook_url).items())
+                if len(pending_embeds) > DC_MAX_EMBEDS_PER_MESSAGE:
+                    self.pending[webhook_url] = dict(pending_embeds[DC_MAX_EMBEDS_PER_MESSAGE:])
+                self.sending = True
+                return webhook_url, dict(pending_embeds[:DC_MAX_EMBEDS_PER_MESSAGE])
+
+    def _finish_message(self, webhook_url, embeds, retry_after, sent):
+        """
+        Schedule the next message to a webhook and queue the embeds of a message again
+        if they have not been sent.
+        """
+        with self.condition:
+            self.not_before[webhook_url] = time.monotonic() + retry_after
+            if not sent:
+                # Embeds that were queued in the meantime replace those with the same title
+                embeds.update(self.pending.get(webhook_url, {}))
+                self.pending[webhook_url] = embeds
+            self.sending = False
+            self.condition.notify_all()
+
+    def _send_pending(self):
+        """Send the queued embeds until the process exits."""
+        while True:
+            webhook_url, embeds = self._next_message()
+            retry_after, sent = 0.0, False
+            try:
+                retry_after, sent = self._post(webhook_url, list(embeds.values()))
+                if sent:
+                    self.attempts.pop(webhook_url, None)
+                    console.print("[bold steel_blue3][+] Discord notification sent.\n")
+                elif not self._count_attempt(webhook_url):
+                    # A webhook that keeps rate limiting would hold up the flush at exit
+                    sent = True
+                    console.error("Failed to send Discord notification: Rate limited.\n")
+            except RequestException as error:
+                if self._is_retryable(error) and self._count_attempt(webhook_url):
+                    attempts = self.attempts[webhook_url]
+                    retry_after = DC_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+                else:
+                    self.attempts.pop(webhook_url, None)
+                    sent = True
+                    console.error(f"Failed to send Discord notification: {error}\n")
+            except Exception as error:
+                sent = True
+                console.error(f"An unexpected error occurred: {error}\n")
+            self._finish_message(webhook_url, embeds, retry_after, sent)
+
+    def _count_attempt(self, webhook_url):
+        """
+        Count a failed attempt to send the next message to a webhook.
+
+        Rate limited attempts count as well, so that no message is retried forever.
+
+        :param webhook_url: The Discord webhook URL of the message.
+        :return: True if the message may be sent again, False if it ran out of attempts.
+        """
+        attempts = self.attempts.get(webhook_url, 0) + 1
+        if attempts < DC_MAX_ATTEMPTS:
+            self.attempts[webhook_url] = attempts
+            return True
+        self.attempts.pop(webhook_url, None)
+        return False
+
+    @staticmethod
+    def _is_retryable(error):
+        """
+        Check whether a failed message may be sent again.
+
+        Network and server errors may go away on their own, while a message that the
+        webhook rejected, e.g. because it doesn't exist anymore, would fail every time.
+
+        :param error: The error that the message failed with.
+        :return: True if the message should be retried, False otherwise.
+        """
+        return error.response is None or error.response.status_code >= 500
+
+    @staticmethod
+    def _post(webhook_url, embeds):
+        """
+        Post a message to a webhook.
+
+        :param webhook_url: The Discord webhook URL to send the message to.
+        :param embeds: The embeds of the message.
+        :return: How many seconds to wait before the next message to the webhook, and
+            whether the message was accepted.
+        :raises RequestException: If the message could not be sent.
+        """
+        response = requests.post(
+            url=webhook_url,
+            json={
+                "embeds": embeds,
+                "username": DC_WEBHOOK_USERNAME,
+                "avatar_url": DC_WEBHOOK_AVATAR_URL,
+            },
+            timeout=10,
+        )
+
+        retry_after = 0.0
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            retry_after = float(response.headers.get("X-RateLimit-Reset-After", 0))
+        if response.status_code == 429:
+            try:
+                retry_after = max(retry_after, float(response.json()["retry_after"]))
+            except (ValueError, KeyError, TypeError):
+                retry_after = max(retry_after, float(response.headers.get("Retry-After", 1)))
+            return retry_after, False
+
+        response.raise_for_status()
+        return retry_after, True
+
+
+notification_queue = None  # pylint: disable=invalid-name
+notification_queue_lock = Lock()
+
+
+def get_notification_queue():
+    """Accessor function to retrieve the notification queue, creating it on first use."""
+    global notification_queue  # pylint: disable=global-statement
+    with notification_queue_lock:
+        if notification_queue is None:
+            notification_queue = NotificationQueue()
+    return notification_queue
 
 
 class DiscordNotifier:
     @classmethod
-    def _construct_recent_calculations_embeds(cls):
+    def _recent_calculations(cls, run_totals, conversion_currency):
+        """
+        Collect the totals of the run that just finished and of the most recent entries
+        of the price logs, formatted with currency symbols.
+
+        Only the last few entries of the price logs are read and converted, so the cost
+        doesn't grow with the length of the price history.
+
+        :param run_totals: The totals of the run by price source and currency.
+        :param conversion_currency: The conversion currency of the run.
+        :return: A tuple containing the dates, newest first, and a dictionary of totals
+            for each price source.
+        """
+        today = datetime.now()
+        recent_calculations = [
+            (today, [run_totals[price_source]["USD"] for price_source in Parser.SOURCES])
+        ]
+        for date, usd_totals in PriceLogs.tail(DC_RECENT_HISTORY_LIMIT):
+            # An entry of today is from an earlier run and will be replaced by this run
+            if date.date() != today.date():
+                recent_calculations.append((date, usd_totals))
+        recent_calculations = recent_calculations[:DC_RECENT_HISTORY_LIMIT]
+
+        dates = [date for date, _ in recent_calculations]
+        totals = {
+            price_source: {"USD": [], conversion_currency: []} for price_source in Parser.SOURCES
+        }
+        for index, (_, usd_totals) in enumerate(recent_calculations):
+            for price_source, usd_total in zip(Parser.SOURCES, usd_totals):
+                if index == 0:
+                    converted_total = run_totals[price_source][conversion_currency]
+                else:
+                    converted_total = convert(usd_total, "USD", conversion_currency)
+                totals[price_source]["USD"].append(f"${usd_total:.2f}")
+                totals[price_source][conversion_currency].append(
+                    f"{to_symbol(conversion_currency)}{converted_total:.2f}"
+                )
+
+        return dates, totals
+
+    @classmethod
+    def _construct_recent_calculations_embeds(cls, run_totals, conversion_currency):
         """
         Construct the embeds for the Discord message that will be sent after a price
         calculation has been made.
 
+        :param run_totals: The totals of the run by price source and currency.
+        :param conversion_currency: The conversion currency of the run.
         :return: A list of embeds for the Discord message.
         """
-        dates, totals = PriceLogs.read(newest_first=True, with_symbols=True)
+        dates, totals = cls._recent_calculations(run_totals, conversion_currency)
 
         date_field = [
             {
@@ -33,15 +283,13 @@ class DiscordNotifier:
         ]
         price_fields = [
             {
-                "name": f"{price_source.name.title()} (USD | {config.conversion_currency})",
+                "name": f"{price_source.name.title()} (USD | {conversion_currency})",
                 "value": "\n".join(
                     [
                         f"{usd_total} | {converted_total}"
                         for usd_total, converted_total in zip(
                             totals[price_source]["USD"][:DC_RECENT_HISTORY_LIMIT],
-                            totals[price_source][config.conversion_currency][
-                                :DC_RECENT_HISTORY_LIMIT
-                            ],
+                            totals[price_source][conversion_currency][:DC_RECENT_HISTORY_LIMIT],
                         )
                     ]
                 ),
@@ -63,26 +311,57 @@ class DiscordNotifier:
         return embeds
 
     @classmethod
-    def notify(cls, webhook_url):
+    def _construct_portfolio_embed(cls, name, totals, conversion_currency):
+        """
+        Construct the embed for the totals of a portfolio of a batch run.
+
+        :param name: The name of the portfolio.
+        :param totals: The totals of the portfolio by price source and currency.
+        :param conversion_currency: The conversion currency of the portfolio.
+        :return: The embed for the Discord message.
+        """
+        return {
+            "title": f"💼 {name}",
+            "color": 5814783,
+            "fields": [
+                {
+                    "name": f"{price_source.name.title()} (USD | {conversion_currency})",
+                    "value": f"${total['USD']:.2f} | "
+                    f"{to_symbol(conversion_currency)}{total[conversion_currency]:.2f}",
+                    "inline": True,
+                }
+                for price_source, total in totals.items()
+            ],
+        }
+
+    @classmethod
+    def notify(cls, webhook_url, totals, conversion_currency):
         """
         Notify users via Discord about recent price calculations.
 
+        The notification is sent in the background, see NotificationQueue.
+
+        :param webhook_url: The Discord webhook URL to send the notification to.
+        :param totals: The totals of the run by price source and currency.
+        :param conversion_currency: The conversion currency of the run.
+        """
+        embeds = cls._construct_recent_calculations_embeds(totals, conversion_currency)
+        get_notification_queue().put(webhook_url, embeds)
+
+    @classmethod
+    def notify_portfolios(cls, webhook_url, portfolios):
+        """
+        Notify users via Discord about the totals of the portfolios of a batch run.
+
+        The portfolios are queued together, so that they are sent in as few messages
+        as possible, see NotificationQueue.
+
         :param webhook_url: The Discord webhook URL to send the notification to.
+        :param portfolios: The name, the totals by price source and currency and the
+            conversion currency of each portfolio.
         """
-        embeds = cls._construct_recent_calculations_embeds()
-        try:
-            response = requests.post(
-                url=webhook_url,
-                json={
-                    "embeds": embeds,
-                    "username": DC_WEBHOOK_USERNAME,
-                    "avatar_url": DC_WEBHOOK_AVATAR_URL,
-                },
-                timeout=10,
-            )
-            response.raise_for_status()
-            console.print("[bold steel_blue3][+] Discord notification sent.\n")
-        except RequestException as error:
-            console.error(f"Failed to send Discord notification: {error}\n")
-        except Exception as error:
-            console.error(f"An unexpected error occurred: {error}\n")
+        embeds = [
+            cls._construct_portfolio_embed(name, totals, conversion_currency)
+            for name, totals, conversion_currency in portfolios
+        ]
+        get_notification_queue().put(webhook_url, embeds)
@@ -0,0 +1,55 @@
+from tenacity import RetryError
+
+from cs2tracker.scraper.circuit_breaker import CircuitOpenError
+from cs2tracker.scraper.fixtures import FixtureMissingError
+
+# Errors that only affect the price of an item from a single price source
+SOURCE_ERRORS = (ValueError, RetryError, CircuitOpenError, FixtureMissingError)
+
+
+class ConfigError:
+    def __init__(self):
+        self.message = "Invalid configuration. Please fix the config file before running."
+
+
+class ParsingError:
+    def __init__(self, message):
+        self.message = message
+
+
+class RequestLimitExceededError:
+    def __init__(self):
+        self.message = "Too many requests. Consider using proxies to prevent rate limiting."
+
+
+class SourceUnavailableError:
+    def __init__(self, price_source):
+        self.message = (
+            f"Could not load {price_source.name.title()} prices. "
+            "Consider using proxies if you are being rate limited."
+        )
+
+
+class PageLoadError:
+    def __init__(self, status_code):
+        self.message = f"Failed to load page: {status_code}. Retrying..."
+
+
+class FixtureMissingPageError:
+    def __init__(self, url):
+        self.message = f"Page was not recorded in the replayed fixtures: {url}"
+
+
+class UnexpectedError:
+    def __init__(self, error):
+        self.message = f"An unexpected error occurred: {error}"
+
+
+class SheetNotFoundError:
+    def __init__(self):
+        self.message = "Could not find sheet to update."
+
+
+class PortfolioError:
+    def __init__(self, name, error):
+        self.message = f"Failed to update the portfolio {name}: {error}"
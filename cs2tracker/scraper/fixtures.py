@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import zipfile
+from enum import Enum
+from threading import Lock
+
+from requests import RequestException, Response
+from requests.structures import CaseInsensitiveDict
+
+
+class FixtureMode(Enum):
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class FixtureMissingError(RequestException):
+    """Raised when a page is requested during a replay that was never recorded."""
+
+
+class FixtureArchive:
+    """
+    A compressed archive of HTTP responses keyed by their URL.
+
+    Every response is stored as two entries of a zip archive: a JSON document with the
+    URL, status code, headers and encoding of the response, and the raw body. Both are
+    named after a hash of the URL, so that any URL maps to a valid entry name.
+    """
+
+    def __init__(self, archive_path):
+        """
+        Initialize the FixtureArchive class.
+
+        :param archive_path: The path of the zip archive. It doesn't have to exist yet
+            when responses are recorded.
+        """
+        self.lock = Lock()
+        self.archive_path = archive_path
+        self.responses = {}
+        if os.path.isfile(archive_path):
+            self._load()
+
+    @staticmethod
+    def _entry_name(url):
+        """Get the name of the archive entries of the response of a URL."""
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        """Read all responses of the archive into memory."""
+        with zipfile.ZipFile(self.archive_path) as archive:
+            for name in archive.namelist():
+                if not name.endswith(".json"):
+                    continue
+                metadata = json.loads(archive.read(name))
+                body = archive.read(name.removesuffix(".json") + ".body")
+                self.responses[metadata["url"]] = (metadata, body)
+
+    def __len__(self):
+        """Get the number of recorded responses."""
+        return len(self.responses)
+
+    def record(self, url, page):
+        """
+        Record the response to a request, replacing an earlier response of the URL.
+
+        :param url: The URL the page was requested from.
+        :param page: The HTTP response object.
+        """
+        metadata = {
+            "url": url,
+            "status_code": page.status_code,
+            "reason": page.reason,
+            "headers": dict(page.headers),
+            "encoding": page.encoding,
+        }
+        with self.lock:
+            self.responses[url] = (metadata, page.content)
+
+    def replay(self, url):
+        """
+        Build the recorded response to a request.
+
+        :param url: The URL of the request.
+        :return: An HTTP response object equal to the recorded one.
+        :raises FixtureMissingError: If no response was recorded for the URL.
+        """
+        with self.lock:
+            if url not in self.responses:
+                raise FixtureMissingError(f"No recorded response for: {url}")
+            metadata, body = self.responses[url]
+
+        page = Response()
+        page.url = url
+        page.status_code = metadata["status_code"]
+        page.reason = metadata["reason"]
+        page.headers = CaseInsensitiveDict(metadata["headers"])
+        page.encoding = metadata["encoding"]
+        # pylint: disable=protected-access
+        page._content = body
+        # Lets the body be streamed with iter_content like that of a downloaded page
+        page._content_consumed = True
+        return page
+
+    def save(self):
+        """Write all recorded responses to the archive, replacing it atomically."""
+        temporary_path = f"{self.archive_path}.tmp"
+        with self.lock, zipfile.ZipFile(
+            temporary_path, "w", compression=zipfile.ZIP_DEFLATED
+        ) as archive:
+            for url, (metadata, body) in sorted(self.responses.items()):
+                entry_name = self._entry_name(url)
+                archive.writestr(f"{entry_name}.json", json.dumps(metadata, indent=2))
+                archive.writestr(f"{entry_name}.body", body)
+        os.replace(temporary_path, self.archive_path)
@@ -0,0 +1,94 @@
+import os
+from datetime import timedelta
+
+from requests_cache import CachedSession
+
+from cs2tracker.constants import HTTP_CACHE_DIR
+from cs2tracker.util.padded_console import get_console
+
+HTTP_CACHE_EXPIRE_AFTER = timedelta(minutes=5)
+HTTP_CACHE_URLS_EXPIRE_AFTER = {
+    "prices.csgotrader.app/*": timedelta(minutes=5),
+    "steamcommunity.com/market/*": timedelta(minutes=5),
+    "inventory.clash.gg/*": timedelta(minutes=5),
+}
+
+console = get_console()
+
+
+class PersistentCachedSession(CachedSession):
+    # pylint: disable=abstract-method
+    """
+    A requests session with a persistent cache in the user data directory.
+
+    Responses are stored on disk so that they survive between runs. Once a response
+    has expired, it is revalidated with a conditional GET (If-None-Match / If-Modified-
+    Since) so that an unchanged page only costs a 304 instead of a full download. The
+    cache directory is kept below a maximum size by evicting the least recently used
+    responses.
+    """
+
+    def __init__(self, max_size_mb, cache_dir=HTTP_CACHE_DIR):
+        """
+        Initialize the PersistentCachedSession class.
+
+        :param max_size_mb: The maximum size of the cache directory in megabytes.
+        :param cache_dir: The directory to store the cached responses in.
+        """
+        super().__init__(
+            cache_dir,
+            backend="filesystem",
+            # Pickle keeps the raw response body instead of decoding large JSON
+            # price lists into a human-readable format on every write
+            serializer="pickle",
+            expire_after=HTTP_CACHE_EXPIRE_AFTER,
+            urls_expire_after=HTTP_CACHE_URLS_EXPIRE_AFTER,
+            allowable_codes=(200,),
+        )
+        self.max_size = max_size_mb * 1024 * 1024
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """Send a request and mark its cached response as recently used."""
+        response = super().send(request, **kwargs)
+
+        # Responses that are downloaded or revalidated are rewritten to disk anyway,
+        # so only cache hits need their modification time bumped for the LRU eviction
+        cache_key = getattr(response, "cache_key", None)
+        if getattr(response, "from_cache", False) and cache_key:
+            try:
+                os.utime(self._response_path(cache_key))
+            except OSError:
+                pass
+
+        return response
+
+    def _response_path(self, cache_key):
+        """Get the path of the file that stores the response with the given key."""
+        return os.path.join(self.cache.cache_dir, f"{cache_key}{self.cache.responses.extension}")
+
+    def evict(self):
+        """Delete the least recently used responses until the cache directory fits into
+        its maximum size.
+        """
+        cached_files = []
+        for path in self.cache.responses.paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            cached_files.append((stat.st_mtime, stat.st_size, path.stem))
+
+        cache_size = sum(size for _, size, _ in cached_files)
+        for _, size, cache_key in sorted(cached_files):
+            if cache_size <= self.max_size:
+                break
+            try:
+                del self.cache.responses[cache_key]
+            except KeyError:
+                pass
+            cache_size -= size
+
+    def clear_cache(self):
+        """Delete all cached responses."""
+        self.cache.clear()
+        console.info("Cleared the HTTP cache.")
@@ -0,0 +1,153 @@
+import os
+import time
+from collections import Counter
+
+from cs2tracker.scraper.run_stats import LATENCY_BUCKETS
+
+METRICS_PREFIX = "cs2tracker"
+
+
+class MetricsExporter:
+    @classmethod
+    def _escape(cls, label_value):
+        """Escape a label value for the OpenMetrics text format."""
+        return str(label_value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    @classmethod
+    def _sample(cls, name, value, **labels):
+        """Format a single sample of a metric."""
+        if labels:
+            label_pairs = ",".join(
+                f'{label}="{cls._escape(label_value)}"' for label, label_value in labels.items()
+            )
+            return f"{METRICS_PREFIX}_{name}{{{label_pairs}}} {value}"
+        return f"{METRICS_PREFIX}_{name} {value}"
+
+    @classmethod
+    def _family(cls, name, metric_type, description, samples):
+        """Format the metadata and samples of a metric family."""
+        return [
+            f"# TYPE {METRICS_PREFIX}_{name} {metric_type}",
+            f"# HELP {METRICS_PREFIX}_{name} {description}",
+        ] + samples
+
+    @classmethod
+    def _latency_samples(cls, run_stats):
+        """Format the request latency histograms of all price sources."""
+        samples = []
+        for source, (bucket_counts, total_seconds, requests) in run_stats.latencies.items():
+            source = source or "other"
+            for upper_bound, bucket_count in zip(LATENCY_BUCKETS, bucket_counts):
+                samples.append(
+                    cls._sample(
+                        "request_latency_seconds_bucket",
+                        bucket_count,
+                        source=source,
+                        le=upper_bound,
+                    )
+                )
+            samples += [
+                cls._sample("request_latency_seconds_bucket", requests, source=source, le="+Inf"),
+                cls._sample("request_latency_seconds_count", requests, source=source),
+                cls._sample("request_latency_seconds_sum", total_seconds, source=source),
+            ]
+        return samples
+
+    @classmethod
+    def _cache_hit_ratio_samples(cls, run_stats):
+        """Format the hit ratios of the caches that were used during the run."""
+        samples = []
+        for cache, counter_name in (("http", "http cache"), ("item_price", "item price cache")):
+            hits = run_stats.counter_total(f"{counter_name} hits")
+            lookups = hits + run_stats.counter_total(f"{counter_name} misses")
+            if lookups:
+                samples.append(cls._sample("cache_hit_ratio", hits / lookups, cache=cache))
+        return samples
+
+    @classmethod
+    def render(cls, scraper):
+        """
+        Format the results of the last run of a scraper as an OpenMetrics document.
+
+        :param scraper: The Scraper instance that finished a run.
+        :return: The OpenMetrics text of the run.
+        """
+        total_samples = [
+            cls._sample(
+                "portfolio_value", total, source=price_source.name.lower(), currency=currency
+            )
+            for price_source, totals in scraper.totals.items()
+            for currency, total in totals.items()
+        ]
+        item_prices = Counter(price_source for _, price_source, _, _ in scraper.item_prices)
+        owned_items = Counter()
+        for _, price_source, _, owned in scraper.item_prices:
+            owned_items[price_source] += int(owned)
+        item_samples = [
+            cls._sample("items", item_prices[price_source], source=price_source.name.lower())
+            for price_source in scraper.totals
+        ]
+        owned_item_samples = [
+            cls._sample("owned_items", owned_items[price_source], source=price_source.name.lower())
+            for price_source in scraper.totals
+        ]
+        errors = Counter(type(error).__name__ for error in scraper.error_stack)
+        error_samples = [
+            cls._sample("errors", count, type=error_type) for error_type, count in errors.items()
+        ]
+
+        lines = (
+            cls._family("portfolio_value", "gauge", "Value of all owned items.", total_samples)
+            + cls._family("items", "gauge", "Items with a price per source.", item_samples)
+            + cls._family("owned_items", "gauge", "Owned items per source.", owned_item_samples)
+            + cls._family("errors", "gauge", "Errors of the run by type.", error_samples)
+            + cls._family(
+                "request_latency_seconds",
+                "histogram",
+                "Latency of the requests that reached the network.",
+                cls._latency_samples(scraper.stats),
+            )
+            + cls._family(
+                "cache_hit_ratio",
+                "gauge",
+                "Share of lookups answered from a cache.",
+                cls._cache_hit_ratio_samples(scraper.stats),
+            )
+        )
+        run_seconds = scraper.stats.run_seconds()
+        if run_seconds is not None:
+            lines += cls._family(
+                "run_duration_seconds",
+                "gauge",
+                "Wall time of the run.",
+                [cls._sample("run_duration_seconds", run_seconds)],
+            )
+        lines += cls._family(
+            "last_run_timestamp_seconds",
+            "gauge",
+            "Time the run finished at.",
+            [cls._sample("last_run_timestamp_seconds", time.time())],
+        )
+
+        return "\n".join(lines + ["# EOF"]) + "\n"
+
+    @classmethod
+    def write(cls, metrics_file, scraper):
+        """
+        Write the results of the last run of a scraper to an OpenMetrics file.
+
+        The file is replaced atomically, so that a collector never reads a partially
+        written file.
+
+        :param metrics_file: The path of the OpenMetrics file.
+        :param scraper: The Scraper instance that finished a run.
+        :raises OSError: If the file can't be written.
+        """
+        temporary_file = f"{metrics_file}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_file, "w", encoding="utf-8") as metrics:
+                metrics.write(cls.render(scraper))
+            os.replace(temporary_file, metrics_file)
+        finally:
+            if os.path.exists(temporary_file):
+                os.remove(temporary_file)
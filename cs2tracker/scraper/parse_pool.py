@@ -0,0 +1,173 @@
+import atexit
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from cs2tracker.config import get_config
+from cs2tracker.scraper.shared_price_list import SharedPriceList
+
+config = get_config()
+
+
+def _index_page_content(parser, page_state, price_source, item_hrefs, app_settings, path):
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """
+    Rebuild a downloaded page in a worker process and parse it into its index.
+
+    :param parser: The parser to index the page with.
+    :param page_state: The URL, headers, encoding and content of the page.
+    :param price_source: The price source the page belongs to.
+    :param item_hrefs: The hrefs of the items that will be looked up in the index.
+    :param app_settings: The App Settings of the scraper process.
+    :param path: The file to write the index to as a shared price list if the parser
+        indexes pages by their price list, None otherwise.
+    :return: The Parser-specific index of the page, or None if it was written to the
+        shared price list file.
+    """
+    # The worker loaded the config when it started, which may have changed since
+    for option, value in app_settings.items():
+        config.set("App Settings", option, value)
+
+    url, headers, encoding, content = page_state
+    item_page = Response()
+    item_page.status_code = 200
+    item_page.url = url
+    item_page.headers = CaseInsensitiveDict(headers)
+    item_page.encoding = encoding
+    # pylint: disable=protected-access
+    item_page._content = content
+    item_page._content_consumed = True
+    page_index = parser.index_item_page(item_page, price_source, item_hrefs)
+    if path is not None:
+        SharedPriceList.write(page_index, path)
+        return None
+    return page_index
+
+
+class ParsePool:
+    """
+    A pool of worker processes that parses downloaded pages, so that decoding price
+    lists and parsing HTML pages can use more than one CPU core.
+
+    Only the raw pages go to the workers and only the page indexes come back. Each
+    price list is decoded once, by a single worker, and comes back as a SharedPriceList
+    that is mapped into memory rather than as a copy of the decoded price list. Work
+    that is sent to the workers along with shared price lists attaches to the same
+    files, so memory use doesn't grow with the number of workers. Totals, the sheet
+    callback and the price logs stay with the scraper in the main process.
+
+    The shared price lists are kept in a temporary directory of the pool, which is
+    removed when the interpreter exits.
+    """
+
+    def __init__(self):
+        """Initialize the ParsePool class."""
+        self.lock = Lock()
+        self.executor = None
+        self.processes = 0
+        self.directory = None
+
+    def __bool__(self):
+        """Check if the pool has any worker processes."""
+        return self.executor is not None
+
+    def resize(self, processes):
+        """
+        Start, restart or stop the worker processes.
+
+        :param processes: The number of worker processes, or 0 to parse all pages in
+            the calling process.
+        """
+        with self.lock:
+            if processes == self.processes:
+                return
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+            self.processes = processes
+            if processes:
+                self._start_executor()
+
+    def _start_executor(self):
+        """Start the worker processes and the directory of their shared price lists."""
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="cs2tracker-")
+            atexit.register(shutil.rmtree, self.directory, True)
+        # Forking a process that runs request threads can copy held locks into the
+        # workers, so they are always started fresh
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def run(self, function, *args):
+        """
+        Call a module-level function in one of the worker processes.
+
+        If a worker crashed, the workers are started again for the next call.
+
+        :param function: The function to call.
+        :param args: The arguments of the function, which are pickled. Shared price
+            lists are pickled by the path of their file.
+        :return: The return value of the function.
+        :raises BrokenProcessPool: If a worker crashed during the call.
+        """
+        executor = self.executor
+        try:
+            return executor.submit(function, *args).result()  # type: ignore
+        except BrokenProcessPool:
+            with self.lock:
+                # Only the first of the calls that ran into the crash restarts the workers
+                if self.executor is executor:
+                    executor.shutdown(wait=False)  # type: ignore
+                    self._start_executor()
+            raise
+
+    def index_item_page(self, parser, item_page, price_source, item_hrefs):
+        """
+        Parse a page into its index in one of the worker processes.
+
+        :param parser: The parser to index the page with.
+        :param item_page: The HTTP response object containing the page.
+        :param price_source: The price source the page belongs to.
+        :param item_hrefs: The hrefs of the items that will be looked up in the index.
+        :return: The Parser-specific index of the page.
+        :raises ValueError: If the parser could not parse the page
+        """
+        page_state = (
+            item_page.url,
+            dict(item_page.headers),
+            item_page.encoding,
+            item_page.content,
+        )
+        path = None
+        if parser.SHARED_PRICE_LISTS:
+            # The file is created here, so that it can be removed if the worker fails or
+            # crashes before the price list is attached to it
+            file_descriptor, path = tempfile.mkstemp(suffix=".prices", dir=self.directory)
+            os.close(file_descriptor)
+
+        try:
+            page_index = self.run(
+                _index_page_content,
+                parser,
+                page_state,
+                price_source,
+                list(item_hrefs),
+                dict(config.items("App Settings")),
+                path,
+            )
+        except BaseException:
+            if path is not None:
+                os.remove(path)
+            raise
+
+        if path is not None:
+            return SharedPriceList(path, owner=True)
+        return page_index
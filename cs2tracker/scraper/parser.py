@@ -6,12 +6,35 @@ from bs4 import BeautifulSoup
 from bs4.element import Tag
 
 from cs2tracker.config import get_config
-from cs2tracker.constants import CAPSULE_PAGES
+from cs2tracker.scraper.price_list_store import get_price_list_store
+from cs2tracker.util.json_stream import load_object
 from cs2tracker.util.padded_console import get_console
 
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
 config = get_config()
 console = get_console()
 
+# Matches the price span of a listing, which may have several classes besides normal_price
+LXML_PRICE_SPAN_XPATH = (
+    ".//span[contains(concat(' ', normalize-space(@class), ' '), ' normal_price ')]"
+)
+
+# Steam market item types that are searched in bulk, by config section
+STEAM_BULK_SEARCH_TYPES = {
+    "Cases": "tag_CSGO_Type_WeaponCase",
+    "Sticker Capsules": "tag_CSGO_Type_WeaponCase",
+    "Autograph Capsules": "tag_CSGO_Type_WeaponCase",
+    "Major Sticker Capsules": "tag_CSGO_Type_WeaponCase",
+    "Patch Packs": "tag_CSGO_Type_WeaponCase",
+    "Agents": "tag_Type_CustomPlayer",
+    "Case Keys": "tag_CSGO_Tool_WeaponCase_KeyTag",
+    "Music Kits": "tag_CSGO_Type_MusicKit",
+}
+
 
 class PriceSource(Enum):
     STEAM = "steam"
@@ -22,6 +45,14 @@ class PriceSource(Enum):
 
 
 class BaseParser(ABC):
+    # Parsers to look up the price of an item with if this parser can't find it, by
+    # price source and in order of preference
+    FALLBACK_PARSERS = {}
+
+    # Whether the page indexes of this parser are price lists, which the worker
+    # processes of the parse pool share as a SharedPriceList instead of copying them
+    SHARED_PRICE_LISTS = False
+
     @classmethod
     @abstractmethod
     def get_item_page_url(cls, item_href, source=PriceSource.STEAM) -> str:
@@ -36,6 +67,34 @@ class BaseParser(ABC):
 
     @classmethod
     @abstractmethod
+    def index_item_page(cls, item_page, source=PriceSource.STEAM, item_hrefs=None):
+        """
+        Parse the given Parser market page into an index that can be used to look up
+        the prices of all items listed on that page.
+
+        The index is built once per page and run and is then shared by every item whose
+        page URL resolves to the same page.
+
+        :param item_page: The HTTP response object containing the item page content.
+        :param item_hrefs: The hrefs of the items that will be looked up in the index,
+            if not the items of the config. Parsers may leave out all other items.
+        :return: A Parser-specific index of the page content.
+        :raises ValueError: If the page content cannot be parsed.
+        """
+
+    @classmethod
+    @abstractmethod
+    def lookup_item_price(cls, page_index, item_href, source=PriceSource.STEAM) -> float:
+        """
+        Look up the price of an item in the index of a Parser market page.
+
+        :param page_index: The index of the page, as returned by index_item_page.
+        :param item_href: The href of the item listing to find the price for.
+        :return: The price of the item as a float.
+        :raises ValueError: If the item listing or price cannot be found.
+        """
+
+    @classmethod
     def parse_item_price(cls, item_page, item_href, source=PriceSource.STEAM) -> float:
         """
         Parse the price of an item from the given Parser market page and steamcommunity
@@ -46,10 +105,48 @@ class BaseParser(ABC):
         :return: The price of the item as a float.
         :raises ValueError: If the item listing or price span cannot be found.
         """
+        page_index = cls.index_item_page(item_page, source)
+        return cls.lookup_item_price(page_index, item_href, source)
+
+    @classmethod
+    def get_bulk_search_page_url(  # pylint: disable=useless-return
+        cls, section, start=0, source=PriceSource.STEAM
+    ):
+        """
+        Get the URL of a page of a paginated search that lists many items of a config
+        section at once.
+
+        Parsers without a bulk search return None, in which case every item is looked up
+        on its own market page.
+
+        :param section: The config section of the items to search for.
+        :param start: The offset of the first listing on the page.
+        :return: A URL string for the search page, or None.
+        """
+        _ = section, start, source
+        return None
+
+    @classmethod
+    def index_bulk_search_page(cls, search_page, source=PriceSource.STEAM):
+        """
+        Parse a page of a bulk search into the prices of the listed items.
+
+        :param search_page: The HTTP response object containing the search page content.
+        :return: A dictionary of decoded market names and prices (None for items
+            without a price) and the total number of listings of the search.
+        :raises ValueError: If the page content cannot be parsed.
+        """
+        _ = search_page, source
+        return {}, 0
 
 
 class SteamParser(BaseParser):
     STEAM_MARKET_SEARCH_PAGE_BASE_URL = "https://steamcommunity.com/market/search?q={}"
+    STEAM_MARKET_SEARCH_RENDER_URL = (
+        "https://steamcommunity.com/market/search/render/?norender=1&appid=730"
+        "&category_730_Type[]={}&sort_column=name&sort_dir=asc&start={}&count={}"
+    )
+    BULK_SEARCH_PAGE_SIZE = 100
     PRICE_INFO = "Owned: {:<10}  {} price: ${:<10}  Total: ${:<10}"
     NEEDS_TIMEOUT = True
     SOURCES = [PriceSource.STEAM]
@@ -60,12 +157,10 @@ class SteamParser(BaseParser):
 
         # For higher efficiency we want to reuse the same page for sticker capsules (scraper uses caching)
         # Therefore, if the provided item is a sticker capsule we return a search page defined in CAPSULE_PAGES
-        # where all of the sticker capsules of one section are listed
-        for section in config.sections():
-            if section in ("Skins", "Stickers", "Cases", "User Settings", "App Settings"):
-                continue
-            if any(item_href == option for option in config.options(section)):
-                return CAPSULE_PAGES[section]
+        # where all of the sticker capsules of one major are listed
+        capsule_page_url = config.capsule_page_url(item_href)
+        if capsule_page_url:
+            return capsule_page_url
 
         url_encoded_name = item_href.split("/")[-1]
         page_url = cls.STEAM_MARKET_SEARCH_PAGE_BASE_URL.format(url_encoded_name)
@@ -73,23 +168,93 @@ class SteamParser(BaseParser):
         return page_url
 
     @classmethod
-    def parse_item_price(cls, item_page, item_href, source=PriceSource.STEAM):
+    def index_item_page(cls, item_page, source=PriceSource.STEAM, item_hrefs=None):
+        _ = source, item_hrefs
+
+        # Extract all listings of the page in a single pass, so that the items
+        # sharing a search page (e.g. sticker capsules) don't search the page again
+        if lxml_html is not None:
+            return cls._index_listings_lxml(item_page.content)
+        return cls._index_listings_soup(item_page.content)
+
+    @classmethod
+    def _index_listings_soup(cls, page_content):
+        """Map the href of every listing on a Steam market page to the text of its price
+        span, using BeautifulSoup.
+        """
+        item_soup = BeautifulSoup(page_content, "html.parser")
+        listing_prices = {}
+        for item_listing in item_soup.find_all("a", href=True):
+            item_price_span = item_listing.find("span", attrs={"class": "normal_price"})
+            price_text = item_price_span.text if isinstance(item_price_span, Tag) else None
+            listing_prices.setdefault(item_listing["href"], price_text)
+
+        return listing_prices
+
+    @classmethod
+    def _index_listings_lxml(cls, page_content):
+        """Map the href of every listing on a Steam market page to the text of its price
+        span, using lxml.
+        """
+        item_tree = lxml_html.fromstring(page_content)
+        listing_prices = {}
+        for item_listing in item_tree.iterfind(".//a[@href]"):
+            item_price_spans = item_listing.xpath(LXML_PRICE_SPAN_XPATH)
+            price_text = item_price_spans[0].text_content() if item_price_spans else None
+            listing_prices.setdefault(item_listing.get("href"), price_text)
+
+        return listing_prices
+
+    @classmethod
+    def lookup_item_price(cls, page_index, item_href, source=PriceSource.STEAM):
         _ = source
 
-        item_soup = BeautifulSoup(item_page.content, "html.parser")
-        item_listing = item_soup.find("a", attrs={"href": f"{item_href}"})
-        if not isinstance(item_listing, Tag):
+        if item_href not in page_index:
             raise ValueError(f"Steam: Failed to find item listing for: {item_href}")
 
-        item_price_span = item_listing.find("span", attrs={"class": "normal_price"})
-        if not isinstance(item_price_span, Tag):
+        price_text = page_index[item_href]
+        if price_text is None:
             raise ValueError(f"Steam: Failed to find price span in item listing for: {item_href}")
 
-        price_str = item_price_span.text.split()[2]
+        # Listings from a bulk search are indexed with their price already parsed
+        if isinstance(price_text, float):
+            return price_text
+
+        price_str = price_text.split()[2]
         price = float(price_str.replace("$", ""))
 
         return price
 
+    @classmethod
+    def get_bulk_search_page_url(cls, section, start=0, source=PriceSource.STEAM):
+        _ = source
+
+        item_type = STEAM_BULK_SEARCH_TYPES.get(section)
+        if item_type is None:
+            return None
+
+        return cls.STEAM_MARKET_SEARCH_RENDER_URL.format(
+            item_type, start, cls.BULK_SEARCH_PAGE_SIZE
+        )
+
+    @classmethod
+    def index_bulk_search_page(cls, search_page, source=PriceSource.STEAM):
+        _ = source
+
+        data = search_page.json()
+        if not data.get("success"):
+            raise ValueError("Steam: Bulk search failed")
+
+        listing_prices = {}
+        for result in data.get("results", []):
+            # The lowest listing price is given in cents and missing if nothing is listed
+            sell_price = result.get("sell_price")
+            listing_prices.setdefault(
+                result.get("hash_name"), sell_price / 100 if sell_price else None
+            )
+
+        return listing_prices, int(data.get("total_count", 0))
+
 
 class ClashParser(BaseParser):
     CLASH_ITEM_API_BASE_URL = "https://inventory.clash.gg/api/GetItemPrice?id={}"
@@ -107,10 +272,18 @@ class ClashParser(BaseParser):
         return page_url
 
     @classmethod
-    def parse_item_price(cls, item_page, item_href, source=PriceSource.STEAM):
-        _, _ = item_href, source
+    def index_item_page(cls, item_page, source=PriceSource.STEAM, item_hrefs=None):
+        _ = source, item_hrefs
 
         data = item_page.json()
+
+        return data
+
+    @classmethod
+    def lookup_item_price(cls, page_index, item_href, source=PriceSource.STEAM):
+        _ = source
+
+        data = page_index
         if data.get("success", "false") == "false":
             raise ValueError(f"Clash: Response failed for: {item_href}")
 
@@ -127,6 +300,7 @@ class CSGOTraderParser(BaseParser):
     CSGOTRADER_PRICE_LIST = "https://prices.csgotrader.app/latest/{}.json"
     PRICE_INFO = "Owned: {:<10}  {:<10}: ${:<10}  Total: ${:<10}"
     NEEDS_TIMEOUT = False
+    SHARED_PRICE_LISTS = True
     SOURCES = [PriceSource.STEAM, PriceSource.BUFF163, PriceSource.CSFLOAT]
 
     @classmethod
@@ -138,16 +312,47 @@ class CSGOTraderParser(BaseParser):
         return page_url
 
     @classmethod
-    def parse_item_price(cls, item_page, item_href, source=PriceSource.STEAM):
-        # pylint: disable=too-many-branches
-        _ = source
-
-        price_list = item_page.json()
-
+    def _market_name(cls, item_href, source=PriceSource.STEAM):
+        """Convert an item href to the market name used as a key in the price list of
+        the given source.
+        """
         url_decoded_name = unquote(item_href.split("/")[-1])
         if source in (PriceSource.BUFF163, PriceSource.SKINPORT):
             url_decoded_name = url_decoded_name.replace("Holo-Foil", "Holo/Foil")
 
+        return url_decoded_name
+
+    @classmethod
+    def index_item_page(cls, item_page, source=PriceSource.STEAM, item_hrefs=None):
+        # The price list is already keyed by the decoded market name of each item,
+        # so decoding it once per source gives us an index for all item lookups
+        if config.price_list_store:
+            # Only compile the price list into the store if it changed upstream,
+            # otherwise all lookups are answered from the store without decoding it
+            price_list_store = get_price_list_store()
+            fingerprint = price_list_store.fingerprint(item_page)
+            if not price_list_store.is_current(source, fingerprint):
+                price_list_store.rebuild(source, item_page, fingerprint)
+            price_list = price_list_store.price_list(source)
+        elif config.stream_price_lists:
+            # Scan the price list incrementally and only keep the entries of the configured
+            # items instead of materializing every item on the market
+            market_names = {
+                cls._market_name(item_href, source)
+                for item_href in (config.item_hrefs() if item_hrefs is None else item_hrefs)
+            }
+            price_list = load_object(item_page, market_names)
+        else:
+            price_list = item_page.json()
+
+        return price_list
+
+    @classmethod
+    def lookup_item_price(cls, page_index, item_href, source=PriceSource.STEAM):
+        # pylint: disable=too-many-branches
+        price_list = page_index
+
+        url_decoded_name = cls._market_name(item_href, source)
         price_info = price_list.get(url_decoded_name, None)
         if not price_info:
             raise ValueError(f"CSGOTrader: Could not find item price info: {url_decoded_name}")
@@ -190,6 +395,41 @@ class CSGOTraderParser(BaseParser):
         price = float(price)
         return price
 
+    @classmethod
+    def lookup_stored_item_price(cls, item_href, source=PriceSource.STEAM):
+        """
+        Look up the price of an item in the price list store without downloading or
+        decoding any price list.
+
+        :param item_href: The href of the item listing to find the price for.
+        :return: The price of the item as a float.
+        :raises ValueError: If the item is not in the most recently stored price list.
+        """
+        return cls.lookup_item_price(get_price_list_store().price_list(source), item_href, source)
+
+
+class CompositeParser(CSGOTraderParser):
+    """
+    Look up prices in the CSGOTrader price lists and fall back to the per-item Steam
+    and Clash pages for the Steam prices that are missing from them.
+
+    The price lists cover almost every item with a single request per price source, so
+    the slower rate limited pages are only requested for the few items they lack.
+    """
+
+    NEEDS_TIMEOUT = True
+    FALLBACK_PARSERS = {PriceSource.STEAM: [SteamParser, ClashParser]}
+
+
+def get_parser():
+    """
+    Get the parser that the config selects for the scraper.
+
+    The scraper resolves it at the start of every run, so that changing
+    fallback_parsers takes effect without restarting the daemon or the GUI.
+    """
+    return CompositeParser if config.fallback_parsers else CSGOTraderParser
+
 
-# Default parser used by the scraper
-Parser = CSGOTraderParser
+# Default parser, for code that only needs the price sources all parsers share
+Parser = get_parser()
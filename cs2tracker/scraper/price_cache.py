@@ -0,0 +1,89 @@
+import sqlite3
+import time
+from threading import Lock
+
+from cs2tracker.constants import PRICE_CACHE_FILE
+
+
+class ItemPriceCache:
+    """
+    A persistent cache of the most recent price of every item and price source.
+
+    Prices are stored together with the time they were scraped at, so that a run can
+    reuse the prices that are still fresh and only scrape the stale ones again. They are
+    kept apart by the parser that scraped them, so that toggling fallback_parsers
+    doesn't serve prices that the other parser found.
+    """
+
+    def __init__(self, cache_file=PRICE_CACHE_FILE):
+        """Initialize the ItemPriceCache class."""
+        self.lock = Lock()
+        self.connection = sqlite3.connect(cache_file, check_same_thread=False)
+        with self.lock, self.connection:
+            columns = [
+                column[1] for column in self.connection.execute("PRAGMA table_info(item_prices)")
+            ]
+            # Caches of older versions don't know which parser scraped their prices,
+            # which are short-lived anyway and are dropped instead of being migrated
+            if columns and "parser" not in columns:
+                self.connection.execute("DROP TABLE item_prices")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS item_prices ("
+                "item_href TEXT NOT NULL, source TEXT NOT NULL, parser TEXT NOT NULL, "
+                "price REAL NOT NULL, scraped_at REAL NOT NULL, "
+                "PRIMARY KEY (item_href, source, parser)) WITHOUT ROWID"
+            )
+
+    def get(self, item_href, source, parser, max_age):
+        """
+        Get the cached price of an item if it is still fresh.
+
+        :param item_href: The href of the item.
+        :param source: The price source of the price.
+        :param parser: The parser that scrapes the price.
+        :param max_age: The maximum age of the price in seconds.
+        :return: The cached price, or None if there is no fresh price for the item.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT price FROM item_prices "
+                "WHERE item_href = ? AND source = ? AND parser = ? AND scraped_at >= ?",
+                (item_href, source.value, parser.__name__, time.time() - max_age),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def save(self, item_prices, parser):
+        """
+        Store freshly scraped prices in a single transaction.
+
+        :param item_prices: An iterable of (item_href, source, price) tuples.
+        :param parser: The parser that scraped the prices.
+        """
+        scraped_at = time.time()
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO item_prices "
+                "(item_href, source, parser, price, scraped_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (item_href, source.value, parser.__name__, price, scraped_at)
+                    for item_href, source, price in item_prices
+                ],
+            )
+
+    def clear(self):
+        """Delete all cached prices."""
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM item_prices")
+
+
+item_price_cache = None  # pylint: disable=invalid-name
+item_price_cache_lock = Lock()
+
+
+def get_item_price_cache():
+    """Accessor function to retrieve the item price cache, opening it on first use."""
+    global item_price_cache  # pylint: disable=global-statement
+    with item_price_cache_lock:
+        if item_price_cache is None:
+            item_price_cache = ItemPriceCache()
+    return item_price_cache
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import sqlite3
+from threading import Lock
+
+from cs2tracker.constants import PRICE_LIST_STORE_FILE
+from cs2tracker.util.json_stream import STREAM_CHUNK_SIZE, iter_object_items
+
+STORE_INSERT_BATCH_SIZE = 5000
+
+
+class StoredPriceList:
+    """A read-only view of the price list of one source in the price list store."""
+
+    def __init__(self, store, source):
+        """Initialize the StoredPriceList class."""
+        self.store = store
+        self.source = source
+
+    def get(self, market_name, default=None):
+        """
+        Get the price info of an item from the store.
+
+        :param market_name: The market name of the item.
+        :param default: The value to return if the item is not in the price list.
+        :return: The price info of the item.
+        """
+        price_info = self.store.get(self.source, market_name)
+        return default if price_info is None else price_info
+
+
+class PriceListStore:
+    """
+    An indexed on-disk copy of the downloaded price lists.
+
+    Each price list is compiled into a SQLite table keyed by price source and market
+    name, together with a fingerprint of the document it was built from. As long as the
+    upstream document doesn't change, lookups are answered from the store without
+    decoding the price list again.
+    """
+
+    def __init__(self, store_file=PRICE_LIST_STORE_FILE):
+        """Initialize the PriceListStore class."""
+        self.lock = Lock()
+        self.connection = sqlite3.connect(store_file, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS price_lists ("
+                "source TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "source TEXT NOT NULL, market_name TEXT NOT NULL, price_info TEXT NOT NULL, "
+                "PRIMARY KEY (source, market_name)) WITHOUT ROWID"
+            )
+
+    @staticmethod
+    def fingerprint(price_list_page):
+        """
+        Identify the version of a downloaded price list.
+
+        :param price_list_page: The HTTP response object containing the price list.
+        :return: The ETag or Last-Modified header of the response, or a hash of its
+            content if the server sent neither.
+        """
+        etag = price_list_page.headers.get("ETag")
+        if etag:
+            return f"etag:{etag}"
+        last_modified = price_list_page.headers.get("Last-Modified")
+        if last_modified:
+            return f"last-modified:{last_modified}"
+        return f"sha1:{hashlib.sha1(price_list_page.content).hexdigest()}"
+
+    def is_current(self, source, fingerprint):
+        """Check if the store holds the price list of a source with the given
+        fingerprint.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT fingerprint FROM price_lists WHERE source = ?", (source.value,)
+            ).fetchone()
+        return row is not None and row[0] == fingerprint
+
+    def rebuild(self, source, price_list_page, fingerprint):
+        """
+        Replace the stored price list of a source with the content of a downloaded
+        price list.
+
+        The price list is scanned incrementally and written in batches, so the whole
+        document is never materialized in memory.
+
+        :param source: The price source of the price list.
+        :param price_list_page: The HTTP response object containing the price list.
+        :param fingerprint: The fingerprint of the price list.
+        :raises json.JSONDecodeError: If the price list is not a valid JSON object.
+        """
+        price_list_items = iter_object_items(price_list_page.iter_content(STREAM_CHUNK_SIZE))
+
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM prices WHERE source = ?", (source.value,))
+
+            batch = []
+            for market_name, price_info in price_list_items:
+                batch.append((source.value, market_name, json.dumps(price_info)))
+                if len(batch) >= STORE_INSERT_BATCH_SIZE:
+                    self._insert_prices(batch)
+                    batch = []
+            self._insert_prices(batch)
+
+            self.connection.execute(
+                "INSERT OR REPLACE INTO price_lists (source, fingerprint) VALUES (?, ?)",
+                (source.value, fingerprint),
+            )
+
+    def _insert_prices(self, batch):
+        """Insert a batch of (source, market_name, price_info) rows."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO prices (source, market_name, price_info) VALUES (?, ?, ?)",
+            batch,
+        )
+
+    def get(self, source, market_name):
+        """
+        Get the price info of an item from the stored price list of a source.
+
+        :param source: The price source of the price list.
+        :param market_name: The market name of the item.
+        :return: The decoded price info, or None if the item is not in the price list.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT price_info FROM prices WHERE source = ? AND market_name = ?",
+                (source.value, market_name),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def price_list(self, source):
+        """Get a read-only view of the stored price list of a source."""
+        return StoredPriceList(self, source)
+
+
+price_list_store = None  # pylint: disable=invalid-name
+price_list_store_lock = Lock()
+
+
+def get_price_list_store():
+    """Accessor function to retrieve the price list store, opening it on first use."""
+    global price_list_store  # pylint: disable=global-statement
+    with price_list_store_lock:
+        if price_list_store is None:
+            price_list_store = PriceListStore()
+    return price_list_store
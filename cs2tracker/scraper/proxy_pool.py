@@ -0,0 +1,147 @@
+import random
+import time
+from threading import Lock
+from urllib.parse import urlparse
+
+from cs2tracker.util.padded_console import get_console
+
+PROXY_SCORE_SMOOTHING = 0.3
+PROXY_INITIAL_LATENCY = 1.0
+PROXY_MAX_ERROR_RATE = 0.5
+PROXY_MAX_CONSECUTIVE_FAILURES = 3
+PROXY_MIN_SAMPLES = 5
+PROXY_EJECTION_TIME = 60.0
+PROXY_MAX_EJECTION_TIME = 15 * 60.0
+
+console = get_console()
+
+
+class Proxy:
+    # pylint: disable=too-many-instance-attributes
+    """A proxy server together with the health statistics of the requests sent through
+    it.
+    """
+
+    def __init__(self, url, verify=True):
+        """
+        Initialize the Proxy class.
+
+        :param url: The URL of the proxy server, including its credentials.
+        :param verify: Whether TLS certificates should be verified for requests that are
+            sent through the proxy.
+        """
+        self.url = url
+        self.verify = verify
+        self.latency = PROXY_INITIAL_LATENCY
+        self.error_rate = 0.0
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    @property
+    def name(self):
+        """Get the address of the proxy server without its credentials."""
+        parsed_url = urlparse(self.url)
+        return f"{parsed_url.hostname}:{parsed_url.port}"
+
+    @property
+    def score(self):
+        """
+        Get the expected cost of a request through the proxy (lower is better).
+
+        The average latency is scaled up by the error rate, because a failed request
+        has to be sent again.
+        """
+        return self.latency / max(1.0 - self.error_rate, 0.05)
+
+    @property
+    def proxies(self):
+        """Get the proxies argument for a request through the proxy."""
+        return {"http": self.url, "https": self.url}
+
+
+class ProxyPool:
+    """
+    Spread requests across a pool of proxy servers based on how healthy they are.
+
+    Every proxy keeps an exponentially weighted average of its latency and error rate.
+    Requests go to the better one of two randomly chosen healthy proxies, which spreads
+    the load while steering it away from slow proxies. Proxies that keep failing are
+    ejected from the pool for a time that doubles with every ejection.
+
+    Connections are reused per proxy by the proxy managers of the session's adapters,
+    which keep a separate keep-alive pool for every proxy URL.
+    """
+
+    def __init__(self):
+        """Initialize the ProxyPool class."""
+        self.lock = Lock()
+        self.proxies = {}
+
+    def __bool__(self):
+        """Check if the pool has any proxies."""
+        return bool(self.proxies)
+
+    def set_proxies(self, proxies):
+        """
+        Replace the proxies of the pool, keeping the statistics of proxies that stay.
+
+        :param proxies: A list of Proxy instances.
+        """
+        with self.lock:
+            self.proxies = {proxy.url: self.proxies.get(proxy.url, proxy) for proxy in proxies}
+
+    def choose(self):
+        """
+        Choose the proxy to send the next request through.
+
+        :return: A Proxy instance.
+        :raises IndexError: If the pool is empty.
+        """
+        with self.lock:
+            now = time.monotonic()
+            healthy = [proxy for proxy in self.proxies.values() if proxy.ejected_until <= now]
+            if not healthy:
+                # Rather than stalling the run, use the proxy that comes back first
+                return min(self.proxies.values(), key=lambda proxy: proxy.ejected_until)
+            if len(healthy) == 1:
+                return healthy[0]
+            return min(random.sample(healthy, 2), key=lambda proxy: proxy.score)
+
+    def report(self, proxy, latency=None, success=True):
+        """
+        Update the statistics of a proxy with the outcome of a request.
+
+        :param proxy: The proxy the request was sent through.
+        :param latency: How many seconds the request took, or None if it failed without
+            a response.
+        :param success: Whether the request succeeded.
+        """
+        with self.lock:
+            proxy.samples += 1
+            proxy.error_rate += PROXY_SCORE_SMOOTHING * (float(not success) - proxy.error_rate)
+            if latency is not None:
+                proxy.latency += PROXY_SCORE_SMOOTHING * (latency - proxy.latency)
+
+            if success:
+                proxy.consecutive_failures = 0
+                return
+
+            proxy.consecutive_failures += 1
+            unhealthy = proxy.samples >= PROXY_MIN_SAMPLES and (
+                proxy.error_rate > PROXY_MAX_ERROR_RATE
+            )
+            if proxy.consecutive_failures >= PROXY_MAX_CONSECUTIVE_FAILURES or unhealthy:
+                self._eject(proxy)
+
+    def _eject(self, proxy):
+        """Remove a proxy from the pool until its ejection time has passed."""
+        ejection_time = min(PROXY_EJECTION_TIME * 2**proxy.ejections, PROXY_MAX_EJECTION_TIME)
+        proxy.ejections += 1
+        proxy.ejected_until = time.monotonic() + ejection_time
+        proxy.consecutive_failures = 0
+        # Give the proxy a fresh start once it is back in the pool
+        proxy.error_rate = 0.0
+        proxy.samples = 0
+        console.error(f"Ejected failing proxy {proxy.name} for {ejection_time:.0f} seconds.")
@@ -0,0 +1,200 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from urllib.parse import urlparse
+
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+from requests.utils import select_proxy
+
+RATE_LIMIT_INITIAL_RATE = 1.0
+RATE_LIMIT_MIN_RATE = 0.1
+RATE_LIMIT_MAX_RATE = 5.0
+RATE_LIMIT_RATE_INCREASE = 0.1
+RATE_LIMIT_RATE_DECREASE = 0.5
+RATE_LIMIT_BACKOFF_BASE = 1.0
+RATE_LIMIT_BACKOFF_MAX = 30.0
+RATE_LIMIT_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(retry_after):
+    """
+    Parse the value of a Retry-After header.
+
+    :param retry_after: The header value, either in seconds or as an HTTP date.
+    :return: The number of seconds to wait, or None if the value can't be parsed.
+    """
+    if not retry_after:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+        return max((retry_date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    A token bucket that limits the request rate to a single host and adapts the rate
+    to how the host responds.
+
+    The rate is increased additively after every successful request and decreased
+    multiplicatively when the host rejects a request, so that it settles just below the
+    rate the host tolerates.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_INITIAL_RATE, capacity=1):
+        """
+        Initialize the TokenBucket class.
+
+        :param rate: The initial number of requests per second.
+        :param capacity: How many requests may be sent in a burst.
+        """
+        self.lock = Lock()
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.failures = 0
+
+    def acquire(self):
+        """Wait until a request may be sent to the host."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            # Tokens may go negative, which reserves a slot in the future for this request
+            # without holding the lock while waiting for it
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            wait = max(wait, self.blocked_until - now)
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def succeeded(self):
+        """Ramp up the rate after the host accepted a request."""
+        with self.lock:
+            self.failures = 0
+            self.rate = min(self.rate + RATE_LIMIT_RATE_INCREASE, RATE_LIMIT_MAX_RATE)
+
+    def rejected(self, retry_after=None):
+        """
+        Slow down after the host rejected a request.
+
+        :param retry_after: The number of seconds the host asked us to wait, if any.
+        :return: The number of seconds until the next request may be sent.
+        """
+        with self.lock:
+            self.failures += 1
+            self.rate = max(self.rate * RATE_LIMIT_RATE_DECREASE, RATE_LIMIT_MIN_RATE)
+
+            if retry_after is None:
+                # Exponential backoff with full jitter to avoid retrying in lockstep
+                retry_after = random.uniform(
+                    0,
+                    min(RATE_LIMIT_BACKOFF_BASE * 2**self.failures, RATE_LIMIT_BACKOFF_MAX),
+                )
+
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            return retry_after
+
+
+class RateLimiter:
+    """
+    Limit the request rate per host.
+
+    Throttled hosts are limited from the first request on. All other hosts are only
+    limited once they start rejecting requests.
+    """
+
+    def __init__(self):
+        """Initialize the RateLimiter class."""
+        self.lock = Lock()
+        self.buckets = {}
+
+    def reset(self, throttled_hosts=()):
+        """
+        Forget the rate limits of all hosts.
+
+        :param throttled_hosts: Hosts that should be rate limited from the first request
+            on.
+        """
+        with self.lock:
+            self.buckets = {host: TokenBucket() for host in throttled_hosts}
+
+    def _bucket(self, url, create=False):
+        """Get the token bucket of the host of a URL."""
+        host = urlparse(url).hostname
+        with self.lock:
+            if create and host not in self.buckets:
+                self.buckets[host] = TokenBucket()
+            return self.buckets.get(host)
+
+    def acquire(self, url):
+        """Wait until a request may be sent to the host of the given URL."""
+        bucket = self._bucket(url)
+        if bucket:
+            bucket.acquire()
+
+    def update(self, url, response=None):
+        """
+        Adapt the rate limit of a host to the outcome of a request.
+
+        :param url: The URL that was requested.
+        :param response: The HTTP response, or None if the request failed without one.
+        :return: True if the host rejected the request, False otherwise.
+        """
+        if response is not None and response.status_code not in RATE_LIMIT_STATUS_CODES:
+            bucket = self._bucket(url)
+            if bucket and response.ok:
+                bucket.succeeded()
+            return False
+
+        retry_after = None
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        self._bucket(url, create=True).rejected(retry_after)
+        return True
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """
+    An HTTP adapter that waits for the rate limiter before every request it sends.
+
+    Because the adapter sits below the cache of the session, responses that are served
+    from the cache are never delayed. Requests that are sent through a proxy don't come
+    from our own IP address and are left to the proxy pool instead.
+    """
+
+    def __init__(self, rate_limiter, **kwargs):
+        """
+        Initialize the RateLimitedAdapter class.
+
+        :param rate_limiter: The rate limiter to wait for and to report responses to.
+        """
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+
+    def send(self, request, *args, **kwargs):  # pylint: disable=arguments-differ
+        """Send a request once the rate limiter allows it and report the outcome."""
+        if select_proxy(request.url, kwargs.get("proxies")):
+            return super().send(request, *args, **kwargs)
+
+        self.rate_limiter.acquire(request.url)
+        try:
+            response = super().send(request, *args, **kwargs)
+        except RequestException:
+            self.rate_limiter.update(request.url)
+            raise
+
+        self.rate_limiter.update(request.url, response)
+        return response
@@ -0,0 +1,167 @@
+import json
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from threading import Lock
+
+from cs2tracker.util.padded_console import get_console
+
+# Returned for every phase while the statistics are disabled, so that an
+# instrumented block only costs a method call
+DISABLED_PHASE = nullcontext()
+
+# Upper bounds in seconds of the buckets of the request latency histograms
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+console = get_console()
+
+
+class _PhaseTimer:
+    """Add the wall time of a block to a phase of the run statistics."""
+
+    def __init__(self, run_stats, key):
+        """Initialize the _PhaseTimer class."""
+        self.run_stats = run_stats
+        self.key = key
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.run_stats.add_time(self.key, time.perf_counter() - self.start)
+
+
+class RunStats:
+    """
+    Per-phase timers and counters of a scraper run.
+
+    Phases can be split up by price source. Phases that run concurrently (e.g. the
+    requests of the async engine) are timed separately, so their times can add up to
+    more than the wall time of the run.
+    """
+
+    def __init__(self):
+        """Initialize the RunStats class."""
+        self.lock = Lock()
+        self.enabled = False
+        self.timings = {}
+        self.counters = {}
+        self.latencies = {}
+
+    def reset(self, enabled):
+        """
+        Forget the statistics of the previous run.
+
+        :param enabled: Whether statistics should be collected during the next run.
+        """
+        with self.lock:
+            self.enabled = enabled
+            self.timings = {}
+            self.counters = {}
+            self.latencies = {}
+
+    def phase(self, name, source=None):
+        """
+        Time a phase of the run.
+
+        :param name: The name of the phase.
+        :param source: The price source the phase belongs to, if any.
+        :return: A context manager that times the block it wraps.
+        """
+        if not self.enabled:
+            return DISABLED_PHASE
+        return _PhaseTimer(self, (name, source))
+
+    def add_time(self, key, seconds):
+        """Add the wall time of a single call to a phase."""
+        with self.lock:
+            total_seconds, calls = self.timings.get(key, (0.0, 0))
+            self.timings[key] = (total_seconds + seconds, calls + 1)
+
+    def count(self, name, source=None, amount=1):
+        """
+        Increase a counter of the run.
+
+        :param name: The name of the counter.
+        :param source: The price source the counter belongs to, if any.
+        :param amount: How much to increase the counter by.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[(name, source)] = self.counters.get((name, source), 0) + amount
+
+    def observe_latency(self, source, seconds):
+        """
+        Add the latency of a single request to the latency histogram of its source.
+
+        :param source: The price source the request was sent to, if any.
+        :param seconds: How many seconds the request took.
+        """
+        if not self.enabled:
+            return
+        with self.lock:
+            bucket_counts, total_seconds, requests = self.latencies.get(
+                source, ([0] * len(LATENCY_BUCKETS), 0.0, 0)
+            )
+            # The bucket counts are cumulative, like those of a Prometheus histogram
+            for index, upper_bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= upper_bound:
+                    bucket_counts[index] += 1
+            self.latencies[source] = (bucket_counts, total_seconds + seconds, requests + 1)
+
+    def counter_total(self, name):
+        """Get the value of a counter summed up over all price sources."""
+        with self.lock:
+            return sum(
+                value for (counter_name, _), value in self.counters.items() if counter_name == name
+            )
+
+    def run_seconds(self):
+        """Get the wall time of the whole run, or None if it wasn't timed."""
+        with self.lock:
+            seconds, _ = self.timings.get(("run", None), (None, 0))
+            return seconds
+
+    @staticmethod
+    def _label(name, source):
+        """Get the label of a phase or counter in the summary."""
+        return name if source is None else f"{name} {source}"
+
+    def print_summary(self):
+        """Print the timings and counters of the run as a table."""
+        console.title("Run Timings", "green")
+        for (name, source), (seconds, calls) in self.timings.items():
+            console.print(f"{self._label(name, source):<40}: {seconds:8.3f}s {calls:>6} calls")
+
+        if self.counters:
+            console.title("Run Counters", "green")
+            for (name, source), value in self.counters.items():
+                console.print(f"{self._label(name, source):<40}: {value:>15,}")
+
+    def record(self):
+        """Get the timings and counters of the run as a JSON serializable record."""
+        with self.lock:
+            return {
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "phases": [
+                    {"phase": name, "source": source, "seconds": seconds, "calls": calls}
+                    for (name, source), (seconds, calls) in self.timings.items()
+                ],
+                "counters": [
+                    {"counter": name, "source": source, "value": value}
+                    for (name, source), value in self.counters.items()
+                ],
+            }
+
+    def save(self, run_stats_file):
+        """
+        Append the record of the run to a file with one JSON record per line.
+
+        :param run_stats_file: The path of the file.
+        :raises IOError: If there is an error writing to the file.
+        """
+        with open(run_stats_file, "a", encoding="utf-8") as run_stats:
+            run_stats.write(json.dumps(self.record()) + "\n")
@@ -1,92 +1,193 @@
+import asyncio
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from math import ceil
+from threading import Lock
+from urllib.parse import unquote
 
 from requests import RequestException
-from requests.adapters import HTTPAdapter, Retry
-from requests_cache import CachedSession
-from tenacity import RetryError, retry, stop_after_attempt
+from tenacity import (
+    RetryError,
+    Retrying,
+    retry_if_not_exception_type,
+    stop_after_attempt,
+    stop_any,
+    wait_exponential_jitter,
+)
 
 from cs2tracker.config import get_config
-from cs2tracker.constants import AUTHOR_STRING, BANNER
-from cs2tracker.logs import PriceLogs
+from cs2tracker.constants import (
+    AUTHOR_STRING,
+    BANNER,
+    HTTP_CACHE_DIR,
+    ITEM_PRICE_LOGS_FILE,
+    OUTPUT_FILE,
+    RUN_STATS_FILE,
+)
+from cs2tracker.logs import ItemPriceLogs, PriceLogs
+from cs2tracker.scraper.async_engine import AsyncScrapingMixin
+from cs2tracker.scraper.circuit_breaker import CircuitBreakers
 from cs2tracker.scraper.discord_notifier import DiscordNotifier
-from cs2tracker.scraper.parser import Parser
+from cs2tracker.scraper.errors import (
+    SOURCE_ERRORS,
+    ConfigError,
+    FixtureMissingPageError,
+    PageLoadError,
+    ParsingError,
+    RequestLimitExceededError,
+    SheetNotFoundError,
+    SourceUnavailableError,
+    UnexpectedError,
+)
+from cs2tracker.scraper.fixtures import (
+    FixtureArchive,
+    FixtureMissingError,
+    FixtureMode,
+)
+from cs2tracker.scraper.http_cache import PersistentCachedSession
+from cs2tracker.scraper.metrics_exporter import MetricsExporter
+from cs2tracker.scraper.parse_pool import ParsePool
+from cs2tracker.scraper.parser import get_parser
+from cs2tracker.scraper.price_cache import get_item_price_cache
+from cs2tracker.scraper.price_list_store import PriceListStore
+from cs2tracker.scraper.proxy_pool import Proxy, ProxyPool
+from cs2tracker.scraper.rate_limiter import (
+    RATE_LIMIT_STATUS_CODES,
+    RateLimitedAdapter,
+    RateLimiter,
+)
+from cs2tracker.scraper.run_stats import RunStats
 from cs2tracker.util.currency_conversion import convert, to_symbol
 from cs2tracker.util.padded_console import get_console
 
-HTTP_PROXY_URL = "http://{}:@smartproxy.crawlbase.com:8012"
-HTTPS_PROXY_URL = "http://{}:@smartproxy.crawlbase.com:8012"
-
-console = get_console()
-config = get_config()
-
-
-class ConfigError:
-    def __init__(self):
-        self.message = "Invalid configuration. Please fix the config file before running."
-
-
-class ParsingError:
-    def __init__(self, message):
-        self.message = message
-
-
-class RequestLimitExceededError:
-    def __init__(self):
-        self.message = "Too many requests. Consider using proxies to prevent rate limiting."
-
-
-class PageLoadError:
-    def __init__(self, status_code):
-        self.message = f"Failed to load page: {status_code}. Retrying..."
+CRAWLBASE_PROXY_URL = "http://{}:@smartproxy.crawlbase.com:8012"
 
+# Hosts that rate limit our requests unless they are sent through a proxy
+RATE_LIMITED_HOSTS = ["steamcommunity.com", "inventory.clash.gg"]
+MAX_PAGE_LOAD_ATTEMPTS = 5
+PAGE_LOAD_RETRY_WAIT = 0.2
+PAGE_LOAD_RETRY_MAX_WAIT = 5.0
 
-class UnexpectedError:
-    def __init__(self, error):
-        self.message = f"An unexpected error occurred: {error}"
+# Errors that make a fallback parser miss an item, after which the next one is used
+FALLBACK_ERRORS = (ValueError, RequestException, RetryError)
+# Enough threads to query all fallback parsers of an item at the same time
+FALLBACK_WORKERS = 4
 
+console = get_console()
+config = get_config()
 
-class SheetNotFoundError:
-    def __init__(self):
-        self.message = "Could not find sheet to update."
 
+class Scraper(AsyncScrapingMixin):
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+        self,
+        log_file=OUTPUT_FILE,
+        item_price_log_file=ITEM_PRICE_LOGS_FILE,
+        http_cache_dir=HTTP_CACHE_DIR,
+    ):
+        """
+        Initialize the Scraper class.
 
-class Scraper:
-    def __init__(self):
-        """Initialize the Scraper class."""
-        self._start_session()
+        :param log_file: The output file to save the totals of each run to.
+        :param item_price_log_file: The database to save the item prices of each run to.
+        :param http_cache_dir: The directory of the persistent HTTP cache.
+        """
+        self.log_file = log_file
+        self.item_price_log_file = item_price_log_file
+        self.rate_limiter = RateLimiter()
+        self.proxy_pool = ProxyPool()
+        self.circuit_breakers = CircuitBreakers()
+        self.stats = RunStats()
+        self.parse_pool = ParsePool()
+        self._start_session(http_cache_dir)
+        # Guards the error stack and the page indexes, which the threads that query the
+        # fallback parsers and the workers of the async engine write to
+        self.lock = Lock()
+        self.fallback_executor = ThreadPoolExecutor(max_workers=FALLBACK_WORKERS)
         self.error_stack = []
+        self.page_indexes = {}
+        # A long-running scraper (see ScraperDaemon) keeps the indexes of unchanged
+        # pages across runs instead of parsing them again
+        self.retain_page_indexes = False
+        self.retained_page_indexes = {}
+        self.scraped_prices = []
+        self.item_prices = []
+        self.fixture_mode = None
+        self.fixtures = None
+        self.missing_fixtures = {}
 
         # We set the conversion currency as an attribute of the Scraper instance
         # and only update it from the config at the start of the scraping process.
         # This allows us to use the same conversion currency throughout the scraping
         # process and prevents issues with changing the conversion currency while scraping.
+        self.parser = get_parser()
         self.conversion_currency = config.conversion_currency
+        self.async_scraping = config.async_scraping
+        self.max_concurrent_requests = config.max_concurrent_requests
+        self.price_cache_ttl = config.price_cache_ttl_minutes * 60
         self.totals = {
             price_source: {
                 "USD": 0.0,
                 self.conversion_currency: 0.0,
             }
-            for price_source in Parser.SOURCES
+            for price_source in self.parser.SOURCES
         }
 
-    def _start_session(self):
-        """Start a requests session with custom headers and retry logic."""
-        self.session = CachedSession("scraper_cache", backend="memory")
+    def _start_session(self, http_cache_dir):
+        """Start a requests session with a persistent cache, custom headers and rate
+        limiting.
+        """
+        self.session = PersistentCachedSession(config.http_cache_size_mb, http_cache_dir)
         self.session.headers.update(
             {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36"
             }
         )
-        retries = Retry(total=5, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504, 520])
-        self.session.mount("http://", HTTPAdapter(max_retries=retries))
-        self.session.mount("https://", HTTPAdapter(max_retries=retries))
+        # Failed requests are not retried by the adapters, but by _get_page, so that all
+        # retries of a price source are taken from its retry budget
+        # Keep enough pooled connections around for the async engine to reuse one
+        # connection per concurrent request instead of reconnecting
+        pool_size = max(config.max_concurrent_requests, 10)
+        for prefix in ("http://", "https://"):
+            self.session.mount(
+                prefix,
+                RateLimitedAdapter(self.rate_limiter, pool_maxsize=pool_size),
+            )
+
+    def clear_cache(self):
+        """Delete all responses from the persistent HTTP cache and all cached item
+        prices.
+        """
+        self.session.clear_cache()
+        get_item_price_cache().clear()
+
+    def use_fixtures(self, archive_path, mode):
+        """
+        Record every fetched page into a fixture archive, or serve all pages from one
+        without touching the network.
+
+        Replaying a recorded run makes it possible to run and time the whole scraper,
+        including parsing, currency conversion and logging, offline and with stable
+        results.
+
+        :param archive_path: The path of the fixture archive, or None to go back to
+            fetching pages normally.
+        :param mode: A FixtureMode value.
+        """
+        if archive_path is None:
+            self.fixture_mode = None
+            self.fixtures = None
+        else:
+            self.fixture_mode = mode
+            self.fixtures = FixtureArchive(archive_path)
 
     def _error(self, error):
         """Add an error to the error stack and print the last error message from the
         error stack.
         """
-        self.error_stack.append(error)
+        with self.lock:
+            self.error_stack.append(error)
         console.error(f"{error.message}")
 
     def _prepare_new_run(self):
@@ -97,15 +198,45 @@ class Scraper:
         This way, we don't have to create a new Scraper instance for each run.
         """
         self.error_stack.clear()
+        self.page_indexes.clear()
+        self.missing_fixtures.clear()
+        self.scraped_prices.clear()
+        self.item_prices.clear()
+        self.parser = get_parser()
         self.conversion_currency = config.conversion_currency
+        self.price_cache_ttl = config.price_cache_ttl_minutes * 60
+        self.async_scraping = config.async_scraping
+        self.max_concurrent_requests = config.max_concurrent_requests
+
+        # Without proxies, all requests to the hosts of parsers that need a timeout
+        # come from our own IP address and have to be throttled from the start
+        throttled = self.parser.NEEDS_TIMEOUT and not config.use_proxy
+        self.rate_limiter.reset(RATE_LIMITED_HOSTS if throttled else [])
+        self._update_proxy_pool()
+        self.circuit_breakers.reset()
+        self.stats.reset(config.run_stats or config.run_stats_log or bool(config.metrics_file))
+        self.parse_pool.resize(config.parse_processes)
         self.totals = {
             price_source: {
                 "USD": 0.0,
                 self.conversion_currency: 0.0,
             }
-            for price_source in Parser.SOURCES
+            for price_source in self.parser.SOURCES
         }
 
+    def _update_proxy_pool(self):
+        """Fill the proxy pool with the Crawlbase proxy and the user's own proxies, if
+        proxies are enabled.
+        """
+        proxies = []
+        if config.use_proxy:
+            proxy_api_key = config.proxy_api_key
+            if proxy_api_key:
+                # Crawlbase intercepts TLS, so its certificates can't be verified
+                proxies.append(Proxy(CRAWLBASE_PROXY_URL.format(proxy_api_key), verify=False))
+            proxies += [Proxy(proxy_url) for proxy_url in config.proxy_urls]
+        self.proxy_pool.set_proxies(proxies)
+
     def scrape_prices(self, update_sheet_callback=None):
         """
         Scrape prices for capsules and cases, calculate totals in USD and conversion
@@ -120,17 +251,63 @@ class Scraper:
 
         self._prepare_new_run()
 
-        for section in config.sections():
-            if section in ("User Settings", "App Settings"):
-                continue
-            self._scrape_item_prices(section, update_sheet_callback)
+        with self.stats.phase("run"):
+            self._run(update_sheet_callback)
 
-        self._convert_totals()
-        self._print_totals(update_sheet_callback)
-        self._send_discord_notification()
+        self._report_run()
 
-        usd_totals = [self.totals[price_source]["USD"] for price_source in Parser.SOURCES]
-        PriceLogs.save(usd_totals)
+    def _report_run(self):
+        """Print, log and export the statistics of a finished run as configured."""
+        if config.run_stats:
+            self.stats.print_summary()
+        if config.run_stats_log:
+            self.stats.save(RUN_STATS_FILE)
+        if config.metrics_file:
+            try:
+                MetricsExporter.write(config.metrics_file, self)
+            except OSError as error:
+                console.error(f"Failed to write the metrics file: {error}")
+
+    def _run(self, update_sheet_callback=None):
+        """
+        Scrape, print and save the prices of a run, timing each phase of the run.
+
+        :param update_sheet_callback: Optional callback function to update a tksheet
+            that is displayed in the GUI with the latest scraper price calculation.
+        """
+        if config.steam_bulk_search:
+            with self.stats.phase("bulk search"):
+                self._prefetch_bulk_search_pages()
+
+        with self.stats.phase("scrape items"):
+            if self.async_scraping:
+                asyncio.run(self._scrape_all_item_prices_async(update_sheet_callback))
+            else:
+                for section in config.sections():
+                    if section in ("User Settings", "App Settings"):
+                        continue
+                    self._scrape_item_prices(section, update_sheet_callback)
+
+        with self.stats.phase("http cache eviction"):
+            self.session.evict()
+        if self.fixture_mode == FixtureMode.RECORD:
+            self.fixtures.save()
+        if self.price_cache_ttl:
+            with self.stats.phase("item price cache"):
+                get_item_price_cache().save(self.scraped_prices, self.parser)
+
+        with self.stats.phase("currency conversion"):
+            self._convert_totals()
+        with self.stats.phase("console"):
+            self._print_totals(update_sheet_callback)
+            self._print_circuit_breakers()
+        with self.stats.phase("discord"):
+            self._send_discord_notification()
+
+        with self.stats.phase("price logs"):
+            usd_totals = [self.totals[price_source]["USD"] for price_source in self.parser.SOURCES]
+            PriceLogs.save(usd_totals, self.log_file)
+            ItemPriceLogs.save(self.item_prices, self.item_price_log_file)
 
     def _convert_totals(self):
         """
@@ -167,7 +344,7 @@ class Scraper:
         if update_sheet_callback and not (
             self.error_stack and isinstance(self.error_stack[-1], SheetNotFoundError)
         ):
-            update_sheet_callback(["", ""] + ["", ""] * len(Parser.SOURCES))
+            update_sheet_callback(["", ""] + ["", ""] * len(self.parser.SOURCES))
             for price_source, totals in self.totals.items():
                 usd_total = totals["USD"]
                 converted_total = totals[self.conversion_currency]
@@ -180,6 +357,18 @@ class Scraper:
                     ]
                 )
 
+    def _print_circuit_breakers(self):
+        """Print the state of the circuit breakers of all price sources that were
+        requested during the run.
+        """
+        circuit_breakers = list(self.circuit_breakers)
+        if not circuit_breakers:
+            return
+
+        console.title("Price Sources", "green")
+        for circuit_breaker in circuit_breakers:
+            console.print(circuit_breaker.summary())
+
     def _send_discord_notification(self):
         """Send a message to a Discord webhook if notifications are enabled in the
         config file and a webhook URL is provided.
@@ -187,74 +376,566 @@ class Scraper:
         discord_webhook_url = config.discord_webhook_url
 
         if config.discord_notifications and discord_webhook_url:
-            DiscordNotifier.notify(discord_webhook_url)
+            DiscordNotifier.notify(discord_webhook_url, self.totals, self.conversion_currency)
 
-    @retry(stop=stop_after_attempt(10))
-    def _get_page(self, url):
+    def _get_page(self, url, circuit_breaker=None):
         """
-        Get the page content from the given URL, using a proxy if configured. If the
-        request fails, it will retry up to 10 times.
+        Get the page content from the given URL, using a proxy from the proxy pool if
+        configured. If the request fails, it will retry up to MAX_PAGE_LOAD_ATTEMPTS
+        times with exponential backoff, which also lets a retry go through a different
+        proxy.
+
+        Every request waits for the rate limiter of its host, which honours Retry-After
+        and backs off exponentially when the host rejects requests.
 
         :param url: The URL to fetch the page from.
+        :param circuit_breaker: The circuit breaker of the price source the page belongs
+            to. Retries are then taken from its retry budget and no request is sent at
+            all while its circuit is open.
         :return: The HTTP response object containing the page content.
-        :raises RequestException: If the request fails.
-        :raises RetryError: If the retry limit is reached.
+        :raises CircuitOpenError: If the circuit of the price source is open.
+        :raises RetryError: If the retry limit or the retry budget is reached.
+        :raises FixtureMissingError: If the page was never recorded in the fixtures
+            that are replayed.
+        """
+        with self.lock:
+            missing_fixture = self.missing_fixtures.get(url)
+        if missing_fixture is not None:
+            raise missing_fixture
+
+        stop = stop_after_attempt(MAX_PAGE_LOAD_ATTEMPTS)
+        if circuit_breaker is not None:
+            circuit_breaker.before_request()
+            stop = stop_any(stop, circuit_breaker.stop_retrying)
+
+        # A page that is missing from the replayed fixtures will never be found, so it
+        # fails at once instead of sleeping through the retries
+        retrying = Retrying(
+            retry=retry_if_not_exception_type(FixtureMissingError),
+            stop=stop,
+            wait=wait_exponential_jitter(
+                initial=PAGE_LOAD_RETRY_WAIT, max=PAGE_LOAD_RETRY_MAX_WAIT
+            ),
+        )
+        source = circuit_breaker.name if circuit_breaker is not None else None
+        try:
+            with self.stats.phase("http", source):
+                page = retrying(self._load_page, url, source)
+        except RetryError:
+            if circuit_breaker is not None:
+                circuit_breaker.record_failure()
+            raise
+        except FixtureMissingError as error:
+            # Reported once per page rather than for every item on it
+            with self.lock:
+                self.missing_fixtures[url] = error
+            self._error(FixtureMissingPageError(url))
+            raise
+
+        if circuit_breaker is not None:
+            circuit_breaker.record_success()
+        if self.stats.enabled:
+            from_cache = getattr(page, "from_cache", False)
+            self.stats.count("http cache hits" if from_cache else "http cache misses", source)
+            self.stats.count("bytes", source, len(page.content))
+        return page
+
+    def _load_page(self, url, source=None):
         """
-        proxy_api_key = config.proxy_api_key
+        Send a single request for the page at the given URL.
 
-        if config.use_proxy and proxy_api_key:
-            page = self.session.get(
-                url=url,
-                proxies={
-                    "http": HTTP_PROXY_URL.format(proxy_api_key),
-                    "https": HTTPS_PROXY_URL.format(proxy_api_key),
-                },
-                verify=False,
-            )
+        :param url: The URL to fetch the page from.
+        :param source: The name of the price source the page belongs to, under which
+            the latency of the request is recorded.
+        :return: The HTTP response object containing the page content.
+        :raises RequestException: If the request fails.
+        """
+        start = time.perf_counter()
+        if self.fixture_mode == FixtureMode.REPLAY:
+            page = self.fixtures.replay(url)
+        elif self.proxy_pool:
+            page = self._get_page_through_proxy(url)
         else:
             page = self.session.get(url)
 
+        # Responses from the cache didn't reach the network
+        if not getattr(page, "from_cache", False):
+            self.stats.observe_latency(source, time.perf_counter() - start)
+
+        # Failed responses are recorded as well, so that a replay fails the same way
+        # unless a retry succeeded and replaced them
+        if self.fixture_mode == FixtureMode.RECORD:
+            self.fixtures.record(url, page)
+
+        if page.status_code in RATE_LIMIT_STATUS_CODES:
+            self._error(PageLoadError(page.status_code))
+            raise RequestException(f"Rate limited while loading page: {url}")
+
         if not page.ok or not page.content:
             self._error(PageLoadError(page.status_code))
             raise RequestException(f"Failed to load page: {url}")
 
         return page
 
+    def _get_page_through_proxy(self, url):
+        """
+        Get the page at the given URL through a proxy from the proxy pool and report the
+        outcome to the pool.
+
+        :param url: The URL to fetch the page from.
+        :return: The HTTP response object containing the page content.
+        :raises RequestException: If the request fails.
+        """
+        proxy = self.proxy_pool.choose()
+        start = time.perf_counter()
+        try:
+            page = self.session.get(url=url, proxies=proxy.proxies, verify=proxy.verify)
+        except RequestException:
+            self.proxy_pool.report(proxy, success=False)
+            raise
+
+        # Responses from the cache didn't go through the proxy
+        if not getattr(page, "from_cache", False):
+            success = page.ok and page.status_code not in RATE_LIMIT_STATUS_CODES
+            self.proxy_pool.report(proxy, time.perf_counter() - start, success)
+
+        return page
+
+    def _get_item_page_index(self, item_page_url, price_source, parser=None):
+        """
+        Get the index of the page at the given URL, fetching and parsing the page only
+        the first time it is requested during a run.
+
+        Many items share the same page (e.g. a CSGOTrader price list or a Steam capsule
+        search page), so this turns the run from one parse per item into one parse per
+        page.
+
+        :param item_page_url: The URL of the page to get the index for.
+        :param price_source: The price source the page belongs to.
+        :param parser: The parser to index the page with, if it is not the default
+            Parser (e.g. one of its fallback parsers).
+        :return: The Parser-specific index of the page.
+        :raises RequestException: If the request fails.
+        :raises RetryError: If the retry limit is reached.
+        :raises ValueError: If the parser could not parse the page
+        """
+        parser = parser or self.parser
+        index_key = (item_page_url, price_source)
+        with self.lock:
+            if index_key in self.page_indexes:
+                return self.page_indexes[index_key]
+
+        circuit_breaker = self.circuit_breakers.get(parser, price_source)
+        item_page = self._get_page(item_page_url, circuit_breaker)
+        with self.stats.phase("parse", circuit_breaker.name):
+            page_index = self._index_item_page(item_page_url, item_page, price_source, parser)
+        with self.lock:
+            self.page_indexes[index_key] = page_index
+        return page_index
+
+    def _index_item_page(self, item_page_url, item_page, price_source, parser):
+        """
+        Parse a page into its index, or reuse the index of an earlier run if the page
+        has not changed since and page indexes are retained across runs.
+
+        :param item_page_url: The URL of the page.
+        :param item_page: The HTTP response object containing the page.
+        :param price_source: The price source the page belongs to.
+        :param parser: The parser to index the page with.
+        :return: The Parser-specific index of the page.
+        :raises ValueError: If the parser could not parse the page
+        """
+        if not self.retain_page_indexes:
+            return self._parse_item_page(item_page, price_source, parser)
+
+        retained_key = (item_page_url, price_source, parser)
+        fingerprint = PriceListStore.fingerprint(item_page)
+        with self.lock:
+            retained = self.retained_page_indexes.get(retained_key)
+        if retained is not None and retained[0] == fingerprint:
+            self.stats.count("retained page indexes")
+            return retained[1]
+
+        page_index = self._parse_item_page(item_page, price_source, parser)
+        with self.lock:
+            self.retained_page_indexes[retained_key] = (fingerprint, page_index)
+        return page_index
+
+    def _parse_item_page(self, item_page, price_source, parser, item_hrefs=None):
+        """
+        Parse a page into its index, in a worker process of the parse pool if it is
+        enabled.
+
+        :param item_page: The HTTP response object containing the page.
+        :param price_source: The price source the page belongs to.
+        :param parser: The parser to index the page with.
+        :param item_hrefs: The hrefs of the items that will be looked up in the index,
+            if not the items of the config.
+        :return: The Parser-specific index of the page.
+        :raises ValueError: If the parser could not parse the page
+        """
+        # Indexes of the price list store are views of a database connection, which
+        # can't be sent back from a worker process
+        if self.parse_pool and not config.price_list_store:
+            return self.parse_pool.index_item_page(
+                parser,
+                item_page,
+                price_source,
+                config.item_hrefs() if item_hrefs is None else item_hrefs,
+            )
+        return parser.index_item_page(item_page, price_source, item_hrefs)
+
+    def _bulk_search(self, section, item_hrefs, price_source, parser):
+        # pylint: disable=too-many-locals
+        """
+        Page through the bulk search of a config section until all given items were
+        found.
+
+        The search stops early once the remaining search pages would cost more requests
+        than looking up the missing items on their own pages.
+
+        :param section: The config section to run the bulk search for.
+        :param item_hrefs: The hrefs of the items to find.
+        :param price_source: The price source to search.
+        :param parser: The parser whose bulk search is used.
+        :return: A dictionary of the hrefs and prices of the items that were found.
+        :raises RequestException: If the request fails.
+        :raises RetryError: If the retry limit is reached.
+        :raises ValueError: If the parser could not parse a search page
+        """
+        missing = {unquote(item_href.split("/")[-1]): item_href for item_href in item_hrefs}
+        found = {}
+        start = 0
+        while missing:
+            circuit_breaker = self.circuit_breakers.get(parser, price_source)
+            search_page = self._get_page(
+                parser.get_bulk_search_page_url(section, start, price_source), circuit_breaker
+            )
+            with self.stats.phase("parse", circuit_breaker.name):
+                listing_prices, total_count = parser.index_bulk_search_page(
+                    search_page, price_source
+                )
+            if not listing_prices:
+                break
+
+            for market_name, price in listing_prices.items():
+                item_href = missing.pop(market_name, None)
+                if item_href:
+                    found[item_href] = price
+
+            start += len(listing_prices)
+            remaining_search_pages = ceil(max(total_count - start, 0) / len(listing_prices))
+            missing_item_pages = {
+                parser.get_item_page_url(item_href, price_source) for item_href in missing.values()
+            }
+            if remaining_search_pages >= len(missing_item_pages):
+                break
+
+        return found
+
+    def _bulk_search_parser(self, section, price_source):
+        """
+        Get the parser whose bulk search covers a config section, preferring the Parser
+        over its fallback parsers.
+
+        :param section: The config section to search for.
+        :param price_source: The price source to search.
+        :return: The parser, or None if no parser has a bulk search for the section.
+        """
+        for parser in [self.parser] + self.parser.FALLBACK_PARSERS.get(price_source, []):
+            if parser.get_bulk_search_page_url(section, 0, price_source):
+                return parser
+        return None
+
+    def _missing_from_parser(self, item_href, price_source):
+        """
+        Check if the Parser can't find an item on its own page, so that it will be
+        looked up by the fallback parsers.
+
+        :param item_href: The url of the steamcommunity market listing of the item
+        :param price_source: The price source of the price.
+        :return: True if the item is missing from the page, False if it was found or
+            the page could not be loaded.
+        """
+        try:
+            page_index = self._get_item_page_index(
+                self.parser.get_item_page_url(item_href, price_source), price_source
+            )
+            self.parser.lookup_item_price(page_index, item_href, price_source)
+        except SOURCE_ERRORS + (RequestException,) as error:
+            return isinstance(error, ValueError)
+        return False
+
+    def _prefetch_bulk_search_pages(self):
+        """
+        Fill the page indexes of the run with the prices found by a bulk search, so
+        that only the items that were not found are looked up on their own pages.
+
+        The bulk search of the Parser is used if it has one. Otherwise, the bulk search
+        of a fallback parser is used for the items that are missing from the pages of
+        the Parser. Items of different sections that share a bulk search are searched
+        for together.
+        """
+        for price_source in self.parser.SOURCES:
+            searches = {}
+            for section in config.sections():
+                if section in ("User Settings", "App Settings"):
+                    continue
+                parser = self._bulk_search_parser(section, price_source)
+                if parser is None:
+                    continue
+                first_page_url = parser.get_bulk_search_page_url(section, 0, price_source)
+                _, _, item_hrefs = searches.setdefault(first_page_url, (section, parser, []))
+                # Items with a fresh cached price don't need to be searched for
+                item_hrefs += [
+                    item_href
+                    for item_href, owned in config.items(section)
+                    if int(owned) > 0
+                    and self._cached_item_price(item_href, price_source) is None
+                    and (
+                        parser is self.parser or self._missing_from_parser(item_href, price_source)
+                    )
+                ]
+
+            for section, parser, item_hrefs in searches.values():
+                if not item_hrefs:
+                    continue
+                try:
+                    found = self._bulk_search(section, item_hrefs, price_source, parser)
+                except (RequestException, RetryError, ValueError) as error:
+                    console.error(f"Bulk search failed, looking up items one by one: {error}")
+                    continue
+
+                self._fill_page_indexes(found, item_hrefs, price_source, parser)
+
+    def _fill_page_indexes(self, found, item_hrefs, price_source, parser):
+        """
+        Fill the page indexes of the run with the prices found by a bulk search.
+
+        Items share a page index with the other items on their page (e.g. sticker
+        capsules), so a page is only filled in if all of its items were found.
+
+        :param found: A dictionary of the hrefs and prices of the items that were found.
+        :param item_hrefs: The hrefs of all items that were searched for.
+        :param price_source: The price source that was searched.
+        :param parser: The parser whose bulk search was used.
+        """
+        page_hrefs = {}
+        for item_href in item_hrefs:
+            item_page_url = parser.get_item_page_url(item_href, price_source)
+            page_hrefs.setdefault(item_page_url, []).append(item_href)
+        for item_page_url, hrefs in page_hrefs.items():
+            if all(item_href in found for item_href in hrefs):
+                with self.lock:
+                    self.page_indexes[(item_page_url, price_source)] = {
+                        item_href: found[item_href] for item_href in hrefs
+                    }
+
     def _scrape_prices_from_all_sources(self, item_href, owned):
         """
         For a given item href and owned count, scrape the item's price from all sources
         available to the currently registered parser.
 
+        Prices that were scraped within the configured time to live are taken from the
+        item price cache instead.
+
         :param item_href: The url of the steamcommunity market listing of the item
         :param owned: How many of this item the user owns
-        :return: A list of item prices for the different sources
+        :return: A list of item prices for the different sources and whether any of
+            them was taken from the item price cache
         :raises RequestException: If the request fails.
         :raises RetryError: If the retry limit is reached.
         :raises ValueError: If the parser could not find the item
         """
         prices = []
-        for price_source in Parser.SOURCES:
-            try:
-                item_page_url = Parser.get_item_page_url(item_href, price_source)
-                item_page = self._get_page(item_page_url)
-                price_usd = Parser.parse_item_price(item_page, item_href, price_source)
-
-                price_usd_owned = round(float(int(owned) * price_usd), 2)
-                self.totals[price_source]["USD"] += price_usd_owned
-
-                prices += [price_usd, price_usd_owned]
-                console.price(
-                    Parser.PRICE_INFO,
-                    owned,
-                    price_source.name.title(),
-                    price_usd,
-                    price_usd_owned,
+        cached = False
+        for price_source in self.parser.SOURCES:
+            cached_price_usd = self._cached_item_price(item_href, price_source)
+            if cached_price_usd is not None:
+                prices += self._add_item_price(
+                    item_href, price_source, owned, cached_price_usd, cached=True
                 )
-            except ValueError as error:
+                cached = True
+                continue
+            try:
+                price_usd = self._scrape_item_price(item_href, price_source)
+                self.scraped_prices.append((item_href, price_source, price_usd))
+                prices += self._add_item_price(item_href, price_source, owned, price_usd)
+            except SOURCE_ERRORS as error:
                 prices += [0.0, 0.0]
-                self._error(ParsingError(error))
+                self._report_source_error(error, price_source)
 
-        return prices
+        return prices, cached
+
+    def _report_source_error(self, error, price_source):
+        """
+        Put the error that prevented the price of an item from being scraped from a
+        price source on the error stack, unless the page of the item was already
+        reported as missing from the replayed fixtures.
+
+        :param error: One of the SOURCE_ERRORS.
+        :param price_source: The price source of the price.
+        """
+        if not isinstance(error, FixtureMissingError):
+            self._error(self._source_error(error, price_source))
+
+    def _source_error(self, error, price_source):
+        """
+        Convert an error that prevented the price of an item from being scraped from a
+        price source to the error that is put on the error stack.
+
+        :param error: The ValueError of the parser, or the RetryError,
+            CircuitOpenError or FixtureMissingError of a page that could not be loaded.
+        :param price_source: The price source of the price.
+        :return: A ParsingError, RequestLimitExceededError or SourceUnavailableError
+            instance.
+        """
+        if isinstance(error, ValueError):
+            return ParsingError(error)
+        if isinstance(error, RetryError):
+            return RequestLimitExceededError()
+        return SourceUnavailableError(price_source)
+
+    def _scrape_item_price(self, item_href, price_source):
+        """
+        Scrape the price of an item from a price source, falling back to the fallback
+        parsers of the Parser if the item can't be found on its page.
+
+        :param item_href: The url of the steamcommunity market listing of the item
+        :param price_source: The price source to scrape the price from.
+        :return: The price of the item in USD.
+        :raises RequestException: If the request fails.
+        :raises RetryError: If the retry limit is reached.
+        :raises ValueError: If neither the parser nor its fallbacks could find the item
+        """
+        item_page_url = self.parser.get_item_page_url(item_href, price_source)
+        page_index = self._get_item_page_index(item_page_url, price_source)
+        try:
+            return self.parser.lookup_item_price(page_index, item_href, price_source)
+        except ValueError as error:
+            fallback_parsers = self.parser.FALLBACK_PARSERS.get(price_source)
+            if not fallback_parsers:
+                raise
+            prefetched_price = self._prefetched_fallback_item_price(
+                fallback_parsers, item_href, price_source
+            )
+            if prefetched_price is not None:
+                return prefetched_price
+
+            # The fallback parsers are queried at the same time and the first one that
+            # finds the item in their order of preference wins
+            fallback_futures = [
+                self.fallback_executor.submit(
+                    self._scrape_fallback_item_price, fallback_parser, item_href, price_source
+                )
+                for fallback_parser in fallback_parsers
+            ]
+            fallback_prices = [future.exception() or future.result() for future in fallback_futures]
+            return self._first_fallback_item_price(fallback_prices, error)
+
+    def _scrape_fallback_item_price(self, fallback_parser, item_href, price_source):
+        """
+        Scrape the price of an item with one of the fallback parsers of the Parser.
+
+        :param fallback_parser: The fallback parser to use.
+        :param item_href: The url of the steamcommunity market listing of the item
+        :param price_source: The price source to scrape the price from.
+        :return: The price of the item in USD.
+        :raises RequestException: If the request fails.
+        :raises RetryError: If the retry limit is reached.
+        :raises ValueError: If the fallback parser could not find the item
+        """
+        item_page_url = fallback_parser.get_item_page_url(item_href, price_source)
+        page_index = self._get_item_page_index(item_page_url, price_source, fallback_parser)
+        return fallback_parser.lookup_item_price(page_index, item_href, price_source)
+
+    def _prefetched_fallback_item_price(self, fallback_parsers, item_href, price_source):
+        """
+        Get the price of an item from the page index of the most preferred fallback
+        parser if a bulk search has already filled it in, so that the other fallback
+        parsers don't have to be queried.
+
+        :param fallback_parsers: The fallback parsers, in order of preference.
+        :param item_href: The url of the steamcommunity market listing of the item
+        :param price_source: The price source to scrape the price from.
+        :return: The price of the item in USD, or None if it has to be scraped.
+        """
+        fallback_parser = fallback_parsers[0]
+        item_page_url = fallback_parser.get_item_page_url(item_href, price_source)
+        with self.lock:
+            page_index = self.page_indexes.get((item_page_url, price_source))
+        if page_index is None:
+            return None
+        try:
+            return fallback_parser.lookup_item_price(page_index, item_href, price_source)
+        except ValueError:
+            return None
+
+    def _first_fallback_item_price(self, fallback_prices, error):
+        """
+        Pick the price of the most preferred fallback parser that found the item.
+
+        :param fallback_prices: The price or error of each fallback parser, in order of
+            preference.
+        :param error: The error of the Parser that could not find the item.
+        :return: The price of the item in USD.
+        :raises ValueError: The error of the Parser if no fallback parser found the item
+        """
+        for fallback_price in fallback_prices:
+            if isinstance(fallback_price, FALLBACK_ERRORS):
+                continue
+            if isinstance(fallback_price, BaseException):
+                raise fallback_price
+            return fallback_price
+        raise error
+
+    def _cached_item_price(self, item_href, price_source):
+        """
+        Get the price of an item from the item price cache if it was scraped within the
+        configured time to live.
+
+        :param item_href: The url of the steamcommunity market listing of the item
+        :param price_source: The price source of the price.
+        :return: The cached price in USD, or None if the price has to be scraped.
+        """
+        if not self.price_cache_ttl:
+            return None
+        item_price_cache = get_item_price_cache()
+        price_usd = item_price_cache.get(item_href, price_source, self.parser, self.price_cache_ttl)
+        self.stats.count(
+            "item price cache misses" if price_usd is None else "item price cache hits",
+            price_source.name.title(),
+        )
+        return price_usd
+
+    def _add_item_price(self, item_href, price_source, owned, price_usd, cached=False):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """
+        Add the price of an item to the totals of a price source, print it and record it
+        for the item price logs.
+
+        :param item_href: The url of the steamcommunity market listing of the item
+        :param price_source: The price source the price was scraped from.
+        :param owned: How many of this item the user owns
+        :param price_usd: The price of a single item in USD
+        :param cached: Whether the price was taken from the item price cache, which is
+            marked with an asterisk after the price source
+        :return: The price of a single item and the price of all owned items
+        """
+        price_usd_owned = round(float(int(owned) * price_usd), 2)
+        self.totals[price_source]["USD"] += price_usd_owned
+        self.item_prices.append((item_href, price_source, price_usd, owned))
+
+        with self.stats.phase("console"):
+            console.price(
+                self.parser.PRICE_INFO,
+                owned,
+                price_source.name.title() + ("*" if cached else ""),
+                price_usd,
+                price_usd_owned,
+            )
+
+        return [price_usd, price_usd_owned]
 
     def _scrape_item_prices(self, section, update_sheet_callback=None):
         """
@@ -268,31 +949,50 @@ class Scraper:
             that is displayed in the GUI with the latest scraper price calculation.
         """
         for item_href, owned in config.items(section):
-            if self.error_stack and isinstance(
-                self.error_stack[-1], (RequestLimitExceededError, SheetNotFoundError)
-            ):
+            if self.error_stack and isinstance(self.error_stack[-1], SheetNotFoundError):
                 break
             if int(owned) == 0:
                 continue
 
             item_name = config.option_to_name(item_href, href=True)
-            console.title(item_name, "magenta")
+            with self.stats.phase("console"):
+                console.title(item_name, "magenta")
             try:
-                prices = self._scrape_prices_from_all_sources(item_href, owned)
+                prices, cached = self._scrape_prices_from_all_sources(item_href, owned)
 
                 if update_sheet_callback:
                     try:
-                        update_sheet_callback([item_name, owned] + prices)
+                        update_sheet_callback(
+                            [self._sheet_item_name(item_name, cached), owned] + prices
+                        )
                     except Exception:
                         self._error(SheetNotFoundError())
-
-                if not config.use_proxy and Parser.NEEDS_TIMEOUT:
-                    time.sleep(1)
-            except RetryError:
-                self._error(RequestLimitExceededError())
             except Exception as error:
                 self._error(UnexpectedError(error))
 
+    def _sheet_item_name(self, item_name, cached):
+        """Get the name of an item as it is shown in the sheet, marking items with
+        prices from the item price cache.
+        """
+        return f"{item_name} (cached)" if cached else item_name
+
+    def _owned_items(self):
+        """
+        Get all items that the user owns at least once from the item sections of the
+        config.
+
+        :return: A list of (item_href, owned) tuples.
+        """
+        owned_items = []
+        for section in config.sections():
+            if section in ("User Settings", "App Settings"):
+                continue
+            for item_href, owned in config.items(section):
+                if int(owned) > 0:
+                    owned_items.append((item_href, owned))
+
+        return owned_items
+
 
 if __name__ == "__main__":
     scraper = Scraper()
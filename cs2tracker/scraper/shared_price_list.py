@@ -0,0 +1,116 @@
+import json
+import mmap
+import os
+import struct
+import weakref
+
+# Magic number and number of items at the start of a shared price list
+HEADER = struct.Struct("<4sI")
+HEADER_MAGIC = b"CS2P"
+
+# Offsets and lengths of the market name and the price info of an item
+ENTRY = struct.Struct("<IIII")
+
+
+class SharedPriceList:
+    """
+    A read-only view of a decoded price list that is shared by every process attached
+    to it.
+
+    The price list is serialized once into a compact file that holds the price info of
+    every item as JSON, preceded by an index of the market names sorted for a binary
+    search. All processes map the same file into memory instead of holding their own
+    copy of the decoded price list, so memory use doesn't grow with the number of
+    processes and a lookup only touches the pages it reads.
+
+    Views are pickled by the path of their file, so sending a view to another process
+    attaches it to the same buffer instead of copying the price list.
+    """
+
+    def __init__(self, path, owner=False):
+        """
+        Initialize the SharedPriceList class.
+
+        :param path: The path of a file written by SharedPriceList.write.
+        :param owner: Whether to remove the file once this view is garbage collected.
+        :raises ValueError: If the file is not a shared price list.
+        """
+        self.path = path
+        with open(path, "rb") as price_list_file:
+            self.buffer = mmap.mmap(price_list_file.fileno(), 0, access=mmap.ACCESS_READ)
+        weakref.finalize(self, self._release, self.buffer, path if owner else None)
+
+        magic, self.length = HEADER.unpack_from(self.buffer)
+        if magic != HEADER_MAGIC:
+            raise ValueError(f"Not a shared price list: {path}")
+
+    @staticmethod
+    def _release(buffer, path):
+        """Unmap the buffer of a view and remove its file if the view owns it."""
+        buffer.close()
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+
+    @staticmethod
+    def write(price_list, path):
+        """
+        Serialize a decoded price list into a shared price list file.
+
+        :param price_list: A dictionary of market names and their price info.
+        :param path: The path of the file, which belongs to whoever opens it as the
+            owner.
+        """
+        entries = sorted(
+            (
+                market_name.encode("utf-8"),
+                json.dumps(price_info, separators=(",", ":")).encode("utf-8"),
+            )
+            for market_name, price_info in price_list.items()
+        )
+
+        index = bytearray(HEADER.pack(HEADER_MAGIC, len(entries)))
+        data = []
+        data_offset = HEADER.size + ENTRY.size * len(entries)
+        for market_name, price_info in entries:
+            price_info_offset = data_offset + len(market_name)
+            index += ENTRY.pack(data_offset, len(market_name), price_info_offset, len(price_info))
+            data += [market_name, price_info]
+            data_offset = price_info_offset + len(price_info)
+
+        with open(path, "wb") as price_list_file:
+            price_list_file.write(index)
+            price_list_file.writelines(data)
+
+    def get(self, market_name, default=None):
+        """
+        Get the price info of an item from the shared price list.
+
+        :param market_name: The market name of the item.
+        :param default: The value to return if the item is not in the price list.
+        :return: The price info of the item.
+        """
+        key = market_name.encode("utf-8")
+        low, high = 0, self.length
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, price_info_offset, price_info_length = ENTRY.unpack_from(
+                self.buffer, HEADER.size + ENTRY.size * middle
+            )
+            key_end = key_offset + key_length
+            middle_key = self.buffer[key_offset:key_end]
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                price_info_end = price_info_offset + price_info_length
+                return json.loads(self.buffer[price_info_offset:price_info_end])
+        return default
+
+    def __len__(self):
+        """Get the number of items in the price list."""
+        return self.length
+
+    def __reduce__(self):
+        """Attach an unpickled view to the same file, without taking ownership of it."""
+        return (SharedPriceList, (self.path,))
@@ -0,0 +1,139 @@
+import codecs
+import json
+from json.decoder import scanstring
+
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",:}]"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+decoder = json.JSONDecoder()
+
+
+class _ChunkBuffer:
+    """A text buffer that is filled incrementally from an iterable of byte chunks."""
+
+    def __init__(self, chunks):
+        """Initialize the _ChunkBuffer class."""
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self):
+        """
+        Append the next chunk to the buffer and drop the part that was already consumed.
+
+        :return: False if there is no more data to read, True otherwise.
+        """
+        if self.exhausted:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            self.text += self.text_decoder.decode(b"", final=True)
+        else:
+            consumed = self.pos
+            self.text = self.text[consumed:] + self.text_decoder.decode(chunk)
+            self.pos = 0
+
+        return True
+
+    def skip_whitespace(self):
+        """
+        Move past any whitespace and return the next character.
+
+        :return: The next non-whitespace character, or an empty string at the end of
+            the stream.
+        """
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def decode(self, decode_function):
+        """
+        Decode the next JSON token with the given function, reading more chunks until
+        the token is complete.
+
+        :param decode_function: A function that takes the text and a position and
+            returns the decoded token and its end position.
+        :return: The decoded token.
+        :raises json.JSONDecodeError: If the stream ends in the middle of the token.
+        """
+        while True:
+            try:
+                token, end = decode_function(self.text, self.pos)
+                # A number that is not followed by a delimiter (e.g. "12." or "1e")
+                # may continue in the next chunk
+                if self.exhausted or (end < len(self.text) and self.text[end] in DELIMITERS):
+                    self.pos = end
+                    return token
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self.fill()
+
+    def expect(self, character):
+        """
+        Consume the given character after skipping whitespace.
+
+        :raises json.JSONDecodeError: If the next character is a different one.
+        """
+        if self.skip_whitespace() != character:
+            raise json.JSONDecodeError(f"Expecting '{character}'", self.text, self.pos)
+        self.pos += 1
+
+
+def iter_object_items(chunks, keys=None):
+    """
+    Incrementally decode the key/value pairs of a top-level JSON object.
+
+    Only one value is held in memory at a time, so a huge document can be scanned with
+    a memory footprint that depends on the size of its largest value rather than on the
+    size of the whole document.
+
+    :param chunks: An iterable of byte chunks that make up the JSON document.
+    :param keys: An optional set of keys to keep. Values of all other keys are
+        discarded right after they were scanned.
+    :return: A generator of (key, value) tuples.
+    :raises json.JSONDecodeError: If the document is not a valid JSON object.
+    """
+    buffer = _ChunkBuffer(chunks)
+    buffer.expect("{")
+
+    if buffer.skip_whitespace() == "}":
+        return
+
+    while True:
+        buffer.expect('"')
+        key = buffer.decode(scanstring)
+        buffer.expect(":")
+        buffer.skip_whitespace()
+        value = buffer.decode(decoder.raw_decode)
+        if keys is None or key in keys:
+            yield key, value
+        del value
+
+        next_character = buffer.skip_whitespace()
+        buffer.pos += 1
+        if next_character == "}":
+            return
+        if next_character != ",":
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer.text, buffer.pos - 1)
+
+
+def load_object(response, keys=None):
+    """
+    Decode a JSON object from an HTTP response, keeping only the given keys.
+
+    :param response: The HTTP response object containing the JSON document.
+    :param keys: An optional set of keys to keep.
+    :return: A dictionary with the kept key/value pairs.
+    :raises json.JSONDecodeError: If the response is not a valid JSON object.
+    """
+    return dict(iter_object_items(response.iter_content(STREAM_CHUNK_SIZE), keys))
@@ -0,0 +1,85 @@
+import pytest
+
+from cs2tracker.scraper.circuit_breaker import (
+    CIRCUIT_COOLDOWN,
+    CIRCUIT_FAILURE_THRESHOLD,
+    RETRY_BUDGET_MIN_RETRIES,
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+)
+
+
+def open_circuit(breaker):
+    """Fail enough requests in a row to open the circuit of a breaker."""
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        breaker.before_request()
+        breaker.record_failure()
+
+
+def test_opens_after_consecutive_failures():
+    """Requests fail right away once too many pages failed in a row."""
+    breaker = CircuitBreaker("Steam")
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_success_resets_consecutive_failures():
+    """Failures that are interrupted by a success don't open the circuit."""
+    breaker = CircuitBreaker("Steam")
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_trial_request_closes_circuit():
+    """A single trial request is let through after the cooldown and closes the
+    circuit if it succeeds.
+    """
+    breaker = CircuitBreaker("Steam")
+    open_circuit(breaker)
+    breaker.opened_at -= CIRCUIT_COOLDOWN
+
+    breaker.before_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.before_request()
+
+
+def test_half_open_trial_failure_opens_circuit():
+    """A failed trial request opens the circuit again without a retry."""
+    breaker = CircuitBreaker("Steam")
+    open_circuit(breaker)
+    breaker.opened_at -= CIRCUIT_COOLDOWN
+
+    breaker.before_request()
+    assert breaker.stop_retrying(None)
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_retry_budget_grows_with_requests():
+    """Retries are taken from a budget that grows with the number of requests."""
+    breaker = CircuitBreaker("Steam")
+    for _ in range(RETRY_BUDGET_MIN_RETRIES):
+        assert not breaker.stop_retrying(None)
+    assert breaker.stop_retrying(None)
+
+    for _ in range(5):
+        breaker.before_request()
+    assert not breaker.stop_retrying(None)
+    assert breaker.stop_retrying(None)
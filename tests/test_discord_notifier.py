@@ -0,0 +1,94 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+from cs2tracker.scraper import discord_notifier
+from cs2tracker.scraper.discord_notifier import (
+    DC_MAX_ATTEMPTS,
+    DC_MAX_EMBEDS_PER_MESSAGE,
+    NotificationQueue,
+)
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Record a message and answer with the next response of the webhook."""
+        content_length = int(self.headers["Content-Length"])
+        self.server.messages.append(json.loads(self.rfile.read(content_length)))  # type: ignore
+        responses = self.server.responses  # type: ignore
+        status_code, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode("utf-8"))
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Don't log the requests of the tests."""
+
+
+def send(responses, embeds):
+    """
+    Send embeds to a local webhook and wait until the queue is done with them.
+
+    :param responses: The status codes and JSON bodies that the webhook answers with,
+        the last one for all remaining messages.
+    :param embeds: The embeds to queue.
+    :return: The messages that the webhook received.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookHandler)
+    server.messages = []  # type: ignore
+    server.responses = list(responses)  # type: ignore
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        queue = NotificationQueue()
+        queue.put(f"http://127.0.0.1:{server.server_port}/webhook", embeds)
+        assert queue.flush(timeout=10)
+        assert not queue.attempts
+    finally:
+        server.shutdown()
+        server.server_close()
+    return server.messages  # type: ignore
+
+
+def embed(title):
+    """Build an embed with the given title."""
+    return {"title": title, "fields": []}
+
+
+def test_sent_message_is_not_repeated():
+    """An accepted message is sent exactly once."""
+    messages = send([(204, {})], [embed("Totals")])
+    assert [message["embeds"] for message in messages] == [[embed("Totals")]]
+
+
+def test_rate_limited_message_is_dropped_after_max_attempts():
+    """A webhook that keeps rate limiting doesn't get the message forever."""
+    messages = send([(429, {"retry_after": 0})], [embed("Totals")])
+    assert len(messages) == DC_MAX_ATTEMPTS
+
+
+def test_server_error_is_retried(monkeypatch):
+    """A message that failed with a server error is sent again."""
+    monkeypatch.setattr(discord_notifier, "DC_RETRY_BACKOFF_SECONDS", 0)
+    messages = send([(500, {}), (500, {}), (204, {})], [embed("Totals")])
+    assert len(messages) == 3
+
+
+def test_server_error_is_dropped_after_max_attempts(monkeypatch):
+    """A webhook that keeps failing gets the message at most DC_MAX_ATTEMPTS times."""
+    monkeypatch.setattr(discord_notifier, "DC_RETRY_BACKOFF_SECONDS", 0)
+    messages = send([(500, {})], [embed("Totals")])
+    assert len(messages) == DC_MAX_ATTEMPTS
+
+
+def test_client_error_is_not_retried():
+    """A message that the webhook rejected is dropped right away."""
+    messages = send([(404, {})], [embed("Totals")])
+    assert len(messages) == 1
+
+
+def test_embeds_are_split_into_messages():
+    """Queued embeds are sent in as few messages as Discord allows."""
+    embeds = [embed(f"Portfolio {index}") for index in range(DC_MAX_EMBEDS_PER_MESSAGE + 2)]
+    messages = send([(204, {})], embeds)
+    assert [len(message["embeds"]) for message in messages] == [DC_MAX_EMBEDS_PER_MESSAGE, 2]
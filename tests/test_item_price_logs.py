@@ -0,0 +1,39 @@
+from cs2tracker.logs import ItemPriceLogs
+from cs2tracker.scraper.parser import PriceSource
+
+REDLINE = "https://steamcommunity.com/market/listings/730/AK-47%20%7C%20Redline%20(Field-Tested)"
+KEY = "https://steamcommunity.com/market/listings/730/Kilowatt%20Case"
+
+
+def test_save_replaces_prices_of_the_same_day(tmp_path):
+    """A second run of the day replaces all prices of the first one, including those
+    of items that are missing from the second run.
+    """
+    log_file = tmp_path / "item_prices.sqlite"
+    ItemPriceLogs.save(
+        [
+            (REDLINE, PriceSource.STEAM, 10.0, 1),
+            (REDLINE, PriceSource.BUFF163, 9.0, 1),
+            (KEY, PriceSource.STEAM, 1.0, 3),
+        ],
+        log_file,
+    )
+    ItemPriceLogs.save([(REDLINE, PriceSource.STEAM, 12.5, 2)], log_file)
+
+    prices = ItemPriceLogs.read(REDLINE, log_file=log_file)
+    assert [(source, price, owned) for _, source, price, owned in prices] == [
+        (PriceSource.STEAM, 12.5, 2)
+    ]
+    assert not ItemPriceLogs.read(KEY, log_file=log_file)
+
+
+def test_read_filters_by_price_source(tmp_path):
+    """Only the prices of the requested price source are read."""
+    log_file = tmp_path / "item_prices.sqlite"
+    ItemPriceLogs.save(
+        [(REDLINE, PriceSource.STEAM, 10.0, 1), (REDLINE, PriceSource.CSFLOAT, 8.0, 1)],
+        log_file,
+    )
+
+    prices = ItemPriceLogs.read(REDLINE, PriceSource.CSFLOAT, log_file=log_file)
+    assert [(source, price) for _, source, price, _ in prices] == [(PriceSource.CSFLOAT, 8.0)]
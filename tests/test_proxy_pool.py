@@ -0,0 +1,94 @@
+import time
+
+from cs2tracker.scraper.proxy_pool import (
+    PROXY_EJECTION_TIME,
+    PROXY_MAX_CONSECUTIVE_FAILURES,
+    PROXY_MAX_EJECTION_TIME,
+    PROXY_MIN_SAMPLES,
+    Proxy,
+    ProxyPool,
+)
+
+
+def proxy_pool(*urls):
+    """Build a proxy pool of the given proxy URLs."""
+    pool = ProxyPool()
+    pool.set_proxies([Proxy(url) for url in urls])
+    return pool
+
+
+def fail(pool, proxy, times=PROXY_MAX_CONSECUTIVE_FAILURES):
+    """Report failed requests through a proxy."""
+    for _ in range(times):
+        pool.report(proxy, success=False)
+
+
+def test_consecutive_failures_eject_proxy():
+    """A proxy that fails several requests in a row is no longer chosen."""
+    pool = proxy_pool("http://a:1", "http://b:2")
+    failing = pool.proxies["http://a:1"]
+    fail(pool, failing, PROXY_MAX_CONSECUTIVE_FAILURES - 1)
+    assert failing.ejected_until == 0.0
+
+    fail(pool, failing, 1)
+    assert failing.ejected_until > time.monotonic()
+    assert all(pool.choose() is pool.proxies["http://b:2"] for _ in range(20))
+
+
+def test_ejection_time_doubles_up_to_maximum():
+    """Every ejection of a proxy lasts twice as long as the one before."""
+    pool = proxy_pool("http://a:1")
+    proxy = pool.proxies["http://a:1"]
+    ejection_times = []
+    for _ in range(6):
+        fail(pool, proxy)
+        ejection_times.append(proxy.ejected_until - time.monotonic())
+
+    assert PROXY_EJECTION_TIME - 1 < ejection_times[0] <= PROXY_EJECTION_TIME
+    assert 2 * PROXY_EJECTION_TIME - 1 < ejection_times[1] <= 2 * PROXY_EJECTION_TIME
+    assert PROXY_MAX_EJECTION_TIME - 1 < ejection_times[-1] <= PROXY_MAX_EJECTION_TIME
+
+
+def test_success_resets_consecutive_failures():
+    """Failures that are interrupted by a success don't eject a proxy."""
+    pool = proxy_pool("http://a:1")
+    proxy = pool.proxies["http://a:1"]
+    fail(pool, proxy, PROXY_MAX_CONSECUTIVE_FAILURES - 1)
+    pool.report(proxy, latency=0.1)
+    fail(pool, proxy, 1)
+    assert proxy.consecutive_failures == 1
+    assert proxy.ejected_until == 0.0
+
+
+def test_high_error_rate_ejects_proxy():
+    """A proxy that fails most of its requests is ejected even if some succeed."""
+    pool = proxy_pool("http://a:1")
+    proxy = pool.proxies["http://a:1"]
+    requests = 0
+    while not proxy.ejections and requests < 20:
+        fail(pool, proxy, PROXY_MAX_CONSECUTIVE_FAILURES - 1)
+        pool.report(proxy, latency=0.1)
+        requests += PROXY_MAX_CONSECUTIVE_FAILURES
+    assert PROXY_MIN_SAMPLES <= requests < 20
+    assert proxy.ejected_until > time.monotonic()
+
+
+def test_all_ejected_chooses_first_to_return():
+    """If every proxy is ejected, the one that comes back first is used."""
+    pool = proxy_pool("http://a:1", "http://b:2")
+    first, second = pool.proxies.values()
+    fail(pool, first)
+    fail(pool, first)
+    fail(pool, second)
+    assert pool.choose() is second
+
+
+def test_set_proxies_keeps_statistics():
+    """Proxies that stay in the pool keep their statistics."""
+    pool = proxy_pool("http://a:1", "http://b:2")
+    fail(pool, pool.proxies["http://a:1"])
+    ejected_until = pool.proxies["http://a:1"].ejected_until
+
+    pool.set_proxies([Proxy("http://a:1"), Proxy("http://c:3")])
+    assert list(pool.proxies) == ["http://a:1", "http://c:3"]
+    assert pool.proxies["http://a:1"].ejected_until == ejected_until
@@ -0,0 +1,104 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from requests import Response
+
+from cs2tracker.scraper.rate_limiter import (
+    RATE_LIMIT_MAX_RATE,
+    RATE_LIMIT_MIN_RATE,
+    RATE_LIMIT_RATE_DECREASE,
+    RATE_LIMIT_RATE_INCREASE,
+    RateLimiter,
+    TokenBucket,
+    parse_retry_after,
+)
+
+
+def response(status_code, headers=None):
+    """Build an HTTP response with the given status code and headers."""
+    page = Response()
+    page.status_code = status_code
+    page.headers.update(headers or {})
+    return page
+
+
+def timed_acquire(bucket):
+    """Acquire a token from a bucket and return how many seconds it took."""
+    start = time.monotonic()
+    bucket.acquire()
+    return time.monotonic() - start
+
+
+def test_bucket_spaces_requests_by_rate():
+    """Requests beyond the capacity of the bucket wait for the next token."""
+    bucket = TokenBucket(rate=10.0, capacity=1)
+    assert timed_acquire(bucket) < 0.05
+    assert timed_acquire(bucket) >= 0.08
+
+
+def test_bucket_rate_adapts_to_responses():
+    """The rate grows additively after successes and shrinks multiplicatively after
+    rejections, within its bounds.
+    """
+    bucket = TokenBucket(rate=1.0)
+    bucket.succeeded()
+    assert bucket.rate == 1.0 + RATE_LIMIT_RATE_INCREASE
+
+    bucket.rejected(retry_after=0.0)
+    assert bucket.rate == (1.0 + RATE_LIMIT_RATE_INCREASE) * RATE_LIMIT_RATE_DECREASE
+
+    for _ in range(20):
+        bucket.rejected(retry_after=0.0)
+    assert bucket.rate == RATE_LIMIT_MIN_RATE
+
+    for _ in range(100):
+        bucket.succeeded()
+    assert bucket.rate == RATE_LIMIT_MAX_RATE
+
+
+def test_bucket_waits_for_retry_after():
+    """A rejection blocks the bucket for the time the host asked for."""
+    bucket = TokenBucket(rate=RATE_LIMIT_MAX_RATE, capacity=5)
+    assert bucket.rejected(retry_after=0.2) == 0.2
+    assert timed_acquire(bucket) >= 0.15
+
+
+def test_bucket_backs_off_exponentially_without_retry_after():
+    """Without a Retry-After, the backoff is drawn from a window that doubles with
+    every rejection in a row.
+    """
+    bucket = TokenBucket()
+    for failures in range(1, 4):
+        assert 0.0 <= bucket.rejected() <= 2**failures
+    bucket.succeeded()
+    assert bucket.failures == 0
+
+
+def test_parse_retry_after():
+    """Retry-After headers are parsed from seconds and HTTP dates."""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    retry_date = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 25.0 < parse_retry_after(format_datetime(retry_date, usegmt=True)) <= 30.0
+
+
+def test_rate_limiter_only_limits_rejecting_hosts():
+    """Hosts are only rate limited once they reject a request, unless they are
+    throttled from the start.
+    """
+    rate_limiter = RateLimiter()
+    rate_limiter.reset(["steamcommunity.com"])
+    assert "steamcommunity.com" in rate_limiter.buckets
+
+    assert not rate_limiter.update("https://example.com/a", response(200))
+    assert "example.com" not in rate_limiter.buckets
+
+    assert rate_limiter.update("https://example.com/a", response(429, {"Retry-After": "0"}))
+    assert "example.com" in rate_limiter.buckets
+    assert rate_limiter.update("https://example.com/a")
+
+    rate_limiter.reset()
+    assert not rate_limiter.buckets